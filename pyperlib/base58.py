@@ -0,0 +1,213 @@
+import functools
+import hashlib
+import math
+
+
+@functools.lru_cache(maxsize=None)
+def load_numpy():
+    """Return the NumPy module, or None if it is not installed."""
+    # NumPy takes a long time to import and only batch conversion needs
+    # it, so it is not loaded until then.
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def require_numpy():
+    """Return the NumPy module, raising an ImportError if it is missing."""
+    numpy = load_numpy()
+    if numpy is None:
+        raise ImportError("NumPy is needed for batch conversion.")
+    return numpy
+
+
+class Codec:
+    """A base58 encoder and decoder for one alphabet, driven by tables."""
+
+    # 58 ** 10 is below 2 ** 64, so long values are converted ten digits per
+    # big-int division. Short ones, like keys and addresses, are faster to
+    # convert directly.
+    chunk = 10
+    long = 128
+    codecs = {}
+
+    def __init__(self, alphabet):
+        """Precompute the lookup tables of an alphabet."""
+        assert len(alphabet) == 58
+        self.alphabet = alphabet
+        self.zero = alphabet[0]
+        self.base = 58 ** self.chunk
+        self.large = 1 << (self.long * 8)
+
+        # Every byte maps to its digit, or to 255 if it is not in alphabet.
+        table = bytearray(b'\xff' * 256)
+        for i, c in enumerate(alphabet):
+            table[ord(c)] = i
+        self.decode_table = bytes(table)
+
+        # Encode two digits at a time from every value below 58 ** 2.
+        self.pairs = [a + b for a in alphabet for b in alphabet]
+
+    @classmethod
+    def get(cls, alphabet):
+        """Return the shared Codec of an alphabet."""
+        codec = cls.codecs.get(alphabet)
+        if codec is None:
+            codec = cls(alphabet)
+            cls.codecs[alphabet] = codec
+        return codec
+
+    def encode(self, bts):
+        """Return the base58 string of bytes."""
+        stripped = bts.lstrip(b'\x00')
+        zeros = len(bts) - len(stripped)
+        value = int.from_bytes(stripped, 'big')
+
+        # Pairs are collected least significant first.
+        pairs = self.pairs
+        out = []
+        while value > self.large:
+            value, r = divmod(value, self.base)
+            for _ in range(self.chunk // 2):
+                r, p = divmod(r, 3364)
+                out.append(pairs[p])
+        while value:
+            value, p = divmod(value, 3364)
+            out.append(pairs[p])
+
+        b58 = "".join(reversed(out)).lstrip(self.zero)
+        return self.zero * zeros + b58
+
+    def decode(self, b58):
+        """Return the bytes of a base58 string, or raise a ValueError."""
+        try:
+            digits = b58.encode("ascii").translate(self.decode_table)
+        except UnicodeEncodeError:
+            digits = b'\xff'
+        if b'\xff' in digits:
+            bad = next(c for c in b58 if c not in self.alphabet)
+            raise ValueError(bad + " is not a valid base58 character.")
+
+        stripped = digits.lstrip(b'\x00')
+        zeros = len(digits) - len(stripped)
+
+        value = 0
+        if len(stripped) > self.long:
+            for i in range(0, len(stripped), self.chunk):
+                part = stripped[i:i + self.chunk]
+                v = 0
+                for d in part:
+                    v = v * 58 + d
+                value = value * 58 ** len(part) + v
+        else:
+            for d in stripped:
+                value = value * 58 + d
+
+        size = (value.bit_length() + 7) // 8
+        return b'\x00' * zeros + value.to_bytes(size, 'big')
+
+    def encode_array(self, rows):
+        """Return the base58 strings of every row of an (N, W) uint8 array."""
+        numpy = require_numpy()
+        rows = numpy.asarray(rows, dtype=numpy.uint8)
+        count, width = rows.shape
+
+        # Each row becomes big-endian 32 bit limbs, held in 64 bits so that
+        # a limb and a remainder can be combined without overflow.
+        limbs = -(-width // 4)
+        padded = numpy.zeros((count, limbs * 4), dtype=numpy.uint8)
+        padded[:, limbs * 4 - width:] = rows
+        value = padded.view(">u4").astype(numpy.uint64)
+
+        # Divide every row by 58 ** 5 per step, which gives five digits.
+        steps = -(-math.ceil(width * 8 / math.log2(58)) // 5)
+        divisor = numpy.uint64(58 ** 5)
+        shift = numpy.uint64(32)
+        digits = numpy.zeros((count, steps * 5), dtype=numpy.uint8)
+        for step in range(steps):
+            r = numpy.zeros(count, dtype=numpy.uint64)
+            for i in range(limbs):
+                cur = (r << shift) | value[:, i]
+                value[:, i] = cur // divisor
+                r = cur % divisor
+            for j in range(5):
+                digits[:, (steps - step) * 5 - 1 - j] = r % 58
+                r //= 58
+
+        chars = numpy.frombuffer(self.alphabet.encode("ascii"),
+                                 dtype=numpy.uint8)[digits]
+        buf = chars.tobytes().decode("ascii")
+        size = digits.shape[1]
+
+        # The encoding keeps one zero character per leading zero byte, and
+        # there are always at least as many leading zero digits as that.
+        lead_digits = (digits != 0).argmax(axis=1)
+        lead_digits[~digits.any(axis=1)] = size
+        lead_bytes = (rows != 0).argmax(axis=1)
+        lead_bytes[~rows.any(axis=1)] = width
+        starts = lead_digits - lead_bytes
+
+        return [buf[i * size + start:(i + 1) * size]
+                for i, start in enumerate(starts.tolist())]
+
+    def decode_check_array(self, strings, width=25, csum_len=4):
+        """Return an (N, W) uint8 array of base58check strings and validity."""
+        # Rows that are not valid base58, do not fit in width bytes, or whose
+        # checksum fails are zeroed and marked False in the validity array.
+        numpy = require_numpy()
+        count = len(strings)
+        length = max([len(s) for s in strings] + [1])
+        zero = self.zero
+
+        raw = "".join(s.rjust(length, zero) for s in strings)
+        try:
+            raw = raw.encode("ascii")
+        except UnicodeEncodeError:
+            raw = raw.encode("ascii", "replace")
+        table = numpy.frombuffer(self.decode_table, dtype=numpy.uint8)
+        digits = table[numpy.frombuffer(raw, dtype=numpy.uint8)]
+        digits = digits.reshape(count, length)
+        valid = ~(digits == 255).any(axis=1)
+        digits[~valid] = 0
+
+        # Accumulate five digits per step into little-endian 32 bit limbs,
+        # with one spare limb to catch values that are too large.
+        limbs = -(-width // 4) + 1
+        value = numpy.zeros((count, limbs), dtype=numpy.uint64)
+        mask = numpy.uint64(0xFFFFFFFF)
+        shift = numpy.uint64(32)
+        for start in range(length % 5 - 5 if length % 5 else 0, length, 5):
+            group = digits[:, max(start, 0):start + 5].astype(numpy.uint64)
+            add = numpy.zeros(count, dtype=numpy.uint64)
+            for j in range(group.shape[1]):
+                add = add * numpy.uint64(58) + group[:, j]
+            carry = add
+            multiplier = numpy.uint64(58 ** group.shape[1])
+            for i in range(limbs):
+                cur = value[:, i] * multiplier + carry
+                value[:, i] = cur & mask
+                carry = cur >> shift
+            valid &= carry == 0
+
+        full = value[:, ::-1].astype(">u4").view(numpy.uint8)
+        full = full.reshape(count, limbs * 4)
+        extra = limbs * 4 - width
+        valid &= ~full[:, :extra].any(axis=1)
+        rows = numpy.ascontiguousarray(full[:, extra:])
+
+        # Leading zero bytes must be spelled as leading zero characters.
+        lead_bytes = (rows != 0).argmax(axis=1)
+        lead_bytes[~rows.any(axis=1)] = width
+        lead_chars = numpy.array([len(s) - len(s.lstrip(zero))
+                                  for s in strings], dtype=lead_bytes.dtype)
+        valid &= lead_bytes == lead_chars
+
+        for i in numpy.flatnonzero(valid):
+            row = rows[i].tobytes()
+            check = hashlib.sha256(hashlib.sha256(row[:-csum_len]).digest())
+            if check.digest()[:csum_len] != row[-csum_len:]:
+                valid[i] = False
+        rows[~valid] = 0
+        return rows, valid
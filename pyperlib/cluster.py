@@ -0,0 +1,328 @@
+from multiprocessing.connection import Client, Listener, wait
+from pyperlib import data, mods, vanity
+import copy
+import math
+import os
+import threading
+import time
+
+
+class ClusterException(Exception):
+    """Raise when a coordinator or node is set up incorrectly."""
+
+
+def parse_address(address):
+    """Turn a host:port string into a tuple, or leave a socket path as is."""
+    if type(address) is not str or "/" in address or ":" not in address:
+        return address
+    host, port = address.rsplit(":", 1)
+    return (host, int(port))
+
+
+def check_authkey(authkey):
+    """Return authkey as bytes, refusing to run without one."""
+    # Connections carry pickles, so only authenticated peers may talk.
+    if not authkey:
+        raise ClusterException("An authkey shared by the coordinator and "
+                               "its nodes is required.")
+    if type(authkey) is str:
+        authkey = authkey.encode()
+    return authkey
+
+
+class RemoteNode:
+    """The coordinator's view of one connected node."""
+
+    def __init__(self, conn, name, jobs):
+        """Create the view from a connection and the node's hello."""
+        self.conn = conn
+        self.name = name
+        self.jobs = jobs
+        self.attempts = 0
+        self.start = time.time()
+        # The keys of a best-effort budget the node was last given.
+        self.limit = None
+
+    @property
+    def rate(self):
+        """Return the number of keys the node tries per second."""
+        elapsed = time.time() - self.start
+        if elapsed <= 0:
+            return 0.0
+        return self.attempts / elapsed
+
+    def send(self, *msg):
+        """Send a message, returning whether the node is still connected."""
+        try:
+            self.conn.send(msg)
+            return True
+        except (OSError, EOFError):
+            return False
+
+
+class RemotePool:
+    """A WorkerPool stand-in that hands searches out to nodes."""
+
+    # The most keys per worker process that a node is given at once from
+    # a best-effort budget.
+    chunk = 256 * vanity.WorkerPool.batch
+
+    def __init__(self, address, authkey):
+        """Listen for nodes on a host:port or Unix socket path."""
+        self.address = parse_address(address)
+        self.authkey = check_authkey(authkey)
+        self.listener = Listener(self.address, authkey=self.authkey)
+        self.nodes = []
+        self.joined = []
+        self.lock = threading.Lock()
+        self.retired = 0
+        self.closed = False
+
+        thread = threading.Thread(target=self.accept, daemon=True)
+        thread.start()
+
+    def accept(self):
+        """Add every node that connects until the pool is closed."""
+        while not self.closed:
+            try:
+                conn = self.listener.accept()
+                kind, name, jobs = conn.recv()
+            except Exception:
+                continue
+            if kind == "hello":
+                with self.lock:
+                    self.joined.append(RemoteNode(conn, name, jobs))
+
+    @property
+    def jobs(self):
+        """Return the number of worker processes across every node."""
+        return sum(node.jobs for node in self.nodes + self.joined)
+
+    def wait_nodes(self, count=1, timeout=None):
+        """Wait until count nodes are connected, returning whether they are."""
+        end = None if timeout is None else time.time() + timeout
+        while len(self.nodes) + len(self.joined) < count:
+            if end is not None and time.time() >= end:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def reset(self):
+        """Clear the attempt counters of the last search."""
+        self.retired = 0
+        for node in self.nodes:
+            node.attempts = 0
+
+    def attempts(self):
+        """Return the number of keys tried in the current search."""
+        return self.retired + sum(node.attempts for node in self.nodes)
+
+    def stats(self):
+        """Return a list of (name, jobs, attempts, rate) for every node."""
+        return [(n.name, n.jobs, n.attempts, n.rate) for n in self.nodes]
+
+    @staticmethod
+    def node_task(task, seed, index, jobs):
+        """Return the part of task that the index-th node walks."""
+        # Every node walks its own streams, derived from a fresh seed, so
+        # that no two workers in the cluster try the same keys.
+        stream = data.ByteData(seed + index.to_bytes(4, 'big'))
+        node_seed = mods.Sha256(stream).bytes
+        node_task = copy.copy(task)
+        node_task.checkpoint = vanity.Checkpoint(None, task.params(),
+                                                 node_seed, [0] * jobs)
+        return node_task
+
+    def share(self, task, node_task, jobs, pending, assigned, start):
+        """Give node_task its part of the budget left, returning if any is."""
+        # Budgets are handed out as nodes become free, so nodes that join
+        # mid-search take part, and no node is held to a share it would
+        # have had to guess when the search began.
+        if task.timeout is not None:
+            node_task.timeout = task.timeout - (time.time() - start)
+            if node_task.timeout <= 0:
+                return False
+        if task.limit is not None:
+            left = task.limit - assigned
+            if left <= 0:
+                return False
+            node_task.limit = min(math.ceil(left * jobs / pending),
+                                  jobs * self.chunk)
+        return True
+
+    @staticmethod
+    def spent(task, assigned, start):
+        """Return whether the budget of a best-effort task has run out."""
+        if task.limit is not None and assigned >= task.limit:
+            return True
+        return (task.timeout is not None and
+                time.time() - start >= task.timeout)
+
+    def run(self, task, callback=None, interval=1.0):
+        """Run task on every node and return the list of results."""
+        self.reset()
+        seed = os.urandom(32)
+        start = time.time()
+        count = 0
+        assigned = 0
+        busy = []
+        found = []
+        errors = []
+        stopped = False
+        idle = list(self.nodes)
+        try:
+            while not (stopped and not busy):
+                # Nodes that join mid-search are put to work straight away.
+                with self.lock:
+                    joined, self.joined = self.joined, []
+                self.nodes += joined
+                idle += joined
+                if stopped:
+                    idle = []
+                pending = sum(node.jobs for node in idle)
+                waiting = []
+                for node in idle:
+                    node_task = self.node_task(task, seed, count, node.jobs)
+                    node.limit = None
+                    if task.top is not None:
+                        if not self.share(task, node_task, node.jobs,
+                                          pending, assigned, start):
+                            # A lost node's keys may be handed back later.
+                            waiting.append(node)
+                            continue
+                        pending -= node.jobs
+                        node.limit = node_task.limit
+                        assigned += node.limit or 0
+                    node.start = time.time()
+                    count += 1
+                    if node.send("task", node_task):
+                        busy.append(node)
+                    elif node.limit is not None:
+                        assigned -= node.limit
+                idle = waiting
+
+                conns = [node.conn for node in busy]
+                if conns:
+                    ready = wait(conns, timeout=interval)
+                else:
+                    ready = []
+                    time.sleep(interval)
+                if not ready and callback is not None:
+                    callback()
+
+                for node in [n for n in busy if n.conn in ready]:
+                    try:
+                        kind, value = node.conn.recv()
+                    except (OSError, EOFError):
+                        kind, value = "lost", None
+
+                    if kind == "progress":
+                        node.attempts = value
+                        continue
+
+                    busy.remove(node)
+                    if kind in ("match", "best"):
+                        found += value
+                    elif kind == "error":
+                        errors.append(value)
+                    elif kind == "lost":
+                        # A lost node's keys still count towards progress,
+                        # and the ones it never tried go back to the budget.
+                        self.nodes.remove(node)
+                        if node.limit is not None:
+                            assigned -= max(node.limit - node.attempts, 0)
+                        self.retired += node.attempts
+                        node.attempts = 0
+
+                    # Best-effort nodes take another part of the budget
+                    # once they are done with theirs.
+                    if kind == "best":
+                        self.retired += node.attempts
+                        node.attempts = 0
+                        idle.append(node)
+                    elif kind in ("match", "error") and not stopped:
+                        stopped = True
+                        for n in busy:
+                            n.send("stop")
+
+                if task.top is not None and not busy:
+                    stopped = self.spent(task, assigned, start)
+        except BaseException:
+            for node in busy:
+                node.send("stop")
+            raise
+
+        if errors:
+            raise vanity.WorkerError(errors[0])
+        return found
+
+    def close(self):
+        """Tell every node to exit and stop listening."""
+        self.closed = True
+        with self.lock:
+            self.nodes += self.joined
+            self.joined = []
+        for node in self.nodes:
+            node.send("close")
+            node.conn.close()
+        self.nodes = []
+        self.listener.close()
+
+
+class Node:
+    """A machine that runs the vanity searches a RemotePool hands out."""
+
+    interval = 1.0
+
+    def __init__(self, address, authkey, jobs=None, name=None):
+        """Prepare a node for the coordinator at a host:port or path."""
+        self.address = parse_address(address)
+        self.authkey = check_authkey(authkey)
+        self.pool = vanity.WorkerPool.shared(jobs)
+        if name is None:
+            name = os.uname().nodename + ":" + str(os.getpid())
+        self.name = name
+        self.closing = False
+
+    def serve(self):
+        """Run searches from the coordinator until it closes."""
+        conn = Client(self.address, authkey=self.authkey)
+        conn.send(("hello", self.name, self.pool.jobs))
+        try:
+            while not self.closing:
+                try:
+                    msg = conn.recv()
+                except EOFError:
+                    break
+                if msg[0] == "task":
+                    self.search(conn, msg[1])
+                elif msg[0] == "close":
+                    break
+        finally:
+            conn.close()
+
+    def search(self, conn, task):
+        """Run one task, reporting progress until it ends or is stopped."""
+        def callback():
+            """Send the attempts so far and obey any stop from the parent."""
+            conn.send(("progress", self.pool.attempts()))
+            while conn.poll():
+                kind = conn.recv()[0]
+                if kind == "close":
+                    self.closing = True
+                if kind in ("stop", "close"):
+                    self.pool.stop.set()
+
+        try:
+            found = self.pool.run(task, callback, self.interval)
+        except vanity.WorkerError as e:
+            conn.send(("error", str(e)))
+            return
+
+        conn.send(("progress", self.pool.attempts()))
+        if task.top is not None:
+            conn.send(("best", found))
+        elif found:
+            conn.send(("match", found))
+        else:
+            conn.send(("done", None))
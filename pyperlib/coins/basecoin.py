@@ -8,6 +8,7 @@ class Coin:
     name = "[Base Coin]"
     curve = None
     has_privacy = False
+    compressible = True
 
     has_priv_csum = False
     has_view_csum = False
@@ -24,6 +25,8 @@ class Coin:
     view_format = format.NoFormat()
     addr_format = format.NoFormat()
 
+    recipe = None
+
     def __init__(self, key=None, prompt=None):
         """Construct the coin based on spend, view, or address keys."""
         self.keypair = None
@@ -220,6 +223,19 @@ class Coin:
         """Calculate the addr from the keypair."""
         raise NotImplementedError(self.name + " does not support addr.")
 
+    @classmethod
+    def pub2addr(cls, pub):
+        """Calculate the addr Data of a public key Data."""
+        raise NotImplementedError(cls.name + " does not support pub2addr.")
+
+    @classmethod
+    def derive(cls, name, **inputs):
+        """Return the Data of one output of the coin's recipe."""
+        if cls.recipe is None:
+            raise NotImplementedError(cls.name + " does not have a recipe.")
+        out = cls.recipe.compile(cls, name)(**inputs)[0]
+        return data.ByteData(bytes(out))
+
     def calc_all(self):
         """Attempt to calculate wif/view/addr."""
         if self.keypair is not None:
@@ -2,6 +2,17 @@ from pyperlib import ec, data, mods, format, coins
 from pyperlib.coins import basecoin
 
 
+# The versions come from each coin class when the recipe is compiled, so
+# every bitcoin-derived coin shares it.
+pub_hash = mods.source("pub").hashed("sha256", "ripemd160")
+addr_payload = mods.attr("addr_version") + pub_hash
+wif_payload = (mods.attr("wif_version") + mods.source("priv") +
+               mods.source("flag"))
+bitcoin_recipe = mods.Recipe(hash=pub_hash, payload=addr_payload,
+                             addr=addr_payload.checksum(),
+                             wif=wif_payload.checksum())
+
+
 class Coin(basecoin.Coin):
     """A coin that represents the Bitcoin protocol."""
 
@@ -21,6 +32,8 @@ class Coin(basecoin.Coin):
     wif_len = 36
     addr_len = 24
 
+    recipe = bitcoin_recipe
+
     def make_formats(self):
         """Create all formats supported by the coin."""
         wl = self.wif_len + len(self.wif_version)
@@ -51,14 +64,14 @@ class Coin(basecoin.Coin):
 
     def verifybase58check(self, d):
         """Verify that the data has a correct checksum."""
-        d2 = self.base58check(d[:-4])
-        if not d == d2:
+        if mods.double_sha256(d.buffer[:-4])[:4] != d.buffer[-4:]:
             raise coins.InvalidCoinError("Base58 Checksum failed.")
 
-    def base58check(self, d):
+    @classmethod
+    def base58check(cls, d):
         """Return the base58check encoding of Data."""
-        check = mods.Sha256(mods.Sha256(d))
-        return d + check[:4]
+        check = mods.double_sha256(d.buffer)[:4]
+        return data.ByteData(b"".join((d.buffer, check)))
 
     def validate_wif(self):
         """Raise an error if the wif checksum fails."""
@@ -70,13 +83,26 @@ class Coin(basecoin.Coin):
 
     def calc_wif(self):
         """Calculate the wif key from the keypair."""
-        payload = self.wif_version + self.keypair.priv
-        if self.get_settings().compression:
-            payload += data.HexData("01")
-        self.wif = self.base58check(payload)
+        flag = b'\x01' if self.get_settings().compression else b''
+        self.wif = self.derive("wif", priv=self.keypair.priv.buffer,
+                               flag=flag)
 
     def calc_addr(self):
         """Calculate the addr from the keypair."""
         pub = self.keypair.pub(self.get_settings().compression)
-        payload = mods.Ripemd160(mods.Sha256(pub))
-        self.addr = self.base58check(self.addr_version + payload)
+        self.addr = self.pub2addr(pub)
+
+    @classmethod
+    def pub2addr(cls, pub):
+        """Calculate the addr Data of a public key Data."""
+        return cls.derive("addr", pub=pub.buffer)
+
+    @classmethod
+    def pub2hash(cls, pub):
+        """Calculate the hash160 of a public key Data."""
+        return cls.derive("hash", pub=pub.buffer)
+
+    @classmethod
+    def pub2payload(cls, pub):
+        """Calculate the versioned addr Data, before the checksum."""
+        return cls.derive("payload", pub=pub.buffer)
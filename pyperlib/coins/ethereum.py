@@ -2,18 +2,45 @@ from pyperlib import ec, data, mods, format, coins
 from pyperlib.coins import basecoin
 
 
+def checksum_hex(addr_hex):
+    """Return a lowercase hex address with its mixed-case checksum."""
+    csum = mods.keccak256(addr_hex.encode()).digest().hex()
+    out = "0x"
+
+    for a, c in zip(addr_hex, csum):
+        if c in "89abcdef":
+            out += a.upper()
+        else:
+            out += a
+
+    return out
+
+
+def payload2string(payload):
+    """Return the bytes of the checksummed address of raw address bytes."""
+    return checksum_hex(payload.hex()).encode()
+
+
+addr_payload = mods.source("pub")[1:].hashed("keccak256")[-20:]
+ethereum_recipe = mods.Recipe(payload=addr_payload,
+                              addr=addr_payload.apply(payload2string))
+
+
 class Coin(basecoin.Coin):
     """A coin that represents the Ethereum protocol."""
 
     name = "Ethereum"
     ticker = "eth"
     curve = ec.SECP256K1
+    compressible = False
 
     has_addr_csum = True
 
     wif_type = data.HexData
     addr_type = data.StringData
 
+    recipe = ethereum_recipe
+
     def make_formats(self):
         """Create all formats supported by the coin."""
         self.addr_format = format.Format("address", data.StringData,
@@ -29,19 +56,10 @@ class Coin(basecoin.Coin):
         self.eth_checksum(addr)
         self.addr = addr
 
-    def eth_checksum(self, addr):
+    @classmethod
+    def eth_checksum(cls, addr):
         """Converts a lowercase string address into a checksummed one."""
-        addr_str = addr.string.lower()[2:]
-        csum = mods.Keccak(data.StringData(addr_str)).hex
-        out = "0x"
-
-        for a, c in zip(addr_str, csum):
-            if c in "89ABCDEF":
-                out += a.upper()
-            else:
-                out += a
-
-        return data.StringData(out)
+        return data.StringData(checksum_hex(addr.string.lower()[2:]))
 
     def validate_addr(self):
         """Raise an error if the addr checksum fails."""
@@ -54,8 +72,19 @@ class Coin(basecoin.Coin):
 
     def calc_addr(self):
         """Calculate the addr from the keypair."""
-        keccak = mods.Keccak(self.keypair.pub_u[1:])
-        addr_hex = keccak[-20:]
-        addr_str = "0x" + addr_hex.hex
-        addr = data.StringData(addr_str)
-        self.addr = self.eth_checksum(addr)
+        self.addr = self.pub2addr(self.keypair.pub_u)
+
+    @classmethod
+    def pub2payload(cls, pub):
+        """Return the raw 20 address bytes of an uncompressed public key."""
+        return cls.derive("payload", pub=pub.buffer)
+
+    @classmethod
+    def payload2addr(cls, payload):
+        """Return the checksummed addr Data of raw address bytes."""
+        return data.StringData(checksum_hex(payload.hex.lower()))
+
+    @classmethod
+    def pub2addr(cls, pub):
+        """Calculate the addr Data of an uncompressed public key Data."""
+        return data.StringData(cls.derive("addr", pub=pub.buffer))
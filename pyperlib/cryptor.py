@@ -67,7 +67,7 @@ class Bip38Cryptor(BaseCryptor):
 
     def base58check(self, d):
         """Return the base58checksum of the given data."""
-        return mods.Sha256(mods.Sha256(d))[:4]
+        return mods.DoubleSha256(d)[:4]
 
     def addr_hash(self, coin):
         """Compute a BIP38 address hash from the coin's addr."""
@@ -99,7 +99,8 @@ class Bip38Cryptor(BaseCryptor):
         enc_h1 = mods.Aes256Enc(block1, key_h2)
         enc_h2 = mods.Aes256Enc(block2, key_h2)
 
-        enc_wif = prefix + flag + addr_hash + enc_h1 + enc_h2
+        enc_wif = data.DataBuilder(prefix, flag, addr_hash, enc_h1,
+                                   enc_h2).build()
         coin.wif = enc_wif + self.base58check(enc_wif)
 
     def run_decrypt(self, coin, passphrase=None):
@@ -1,4 +1,4 @@
-from pyperlib import helper
+from pyperlib import helper, base58
 import unicodedata
 
 
@@ -6,6 +6,10 @@ class EncodingException(Exception):
     """Occurs when invalid characters exist during conversion."""
 
 
+class WidthException(Exception):
+    """Occurs when Data does not fit the width of a DataArray."""
+
+
 class DataFactory(helper.NameFactory):
     """A factory to produce data objects based on their name."""
     suffix = "Data"
@@ -14,42 +18,79 @@ class DataFactory(helper.NameFactory):
     @classmethod
     def make_base58_data(cls, b58):
         """Create a new Base58Data type, using different base58_chars."""
-        return type("Base58Data", (Base58Data,), {"base58_chars": b58})
+        base58.Codec.get(b58)
+        attrs = {"__slots__": (), "base58_chars": b58}
+        return type("Base58Data", (Base58Data,), attrs)
+
+
+def restore(cls, bts):
+    """Return Data of type cls with bytes bts, without constructing it."""
+    d = object.__new__(cls)
+    d._set_bytes(bts)
+    return d
 
 
 class BaseData:
     """The base class for all data types."""
 
+    # Data is immutable, so every derived representation is computed once
+    # and kept in its own slot.
+    __slots__ = ("bytes", "_hex", "_int", "_base58")
+
     base58_chars = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
 
+    def _set_bytes(self, bts):
+        """Set the bytes of the Data while it is being constructed."""
+        object.__setattr__(self, "bytes", bts)
+
+    def __setattr__(self, name, value):
+        """Refuse to change the Data after construction."""
+        raise AttributeError("Data objects are immutable.")
+
+    def __delattr__(self, name):
+        """Refuse to change the Data after construction."""
+        raise AttributeError("Data objects are immutable.")
+
+    def __reduce__(self):
+        """Pickle the Data by its bytes, keeping its type."""
+        return (restore, (type(self), self.bytes))
+
+    @property
+    def buffer(self):
+        """Return a memoryview of the Data's bytes, without copying them."""
+        return memoryview(self.bytes)
+
     @property
     def hex(self):
         """Return the hex string of the Data."""
-        return self.bytes.hex().upper()
+        try:
+            return self._hex
+        except AttributeError:
+            value = self.buffer.hex().upper()
+            object.__setattr__(self, "_hex", value)
+            return value
 
     @property
     def int(self):
         """Return the int value of the Data."""
-        return int.from_bytes(self.bytes, byteorder='big', signed=False)
+        try:
+            return self._int
+        except AttributeError:
+            value = int.from_bytes(self.buffer, byteorder='big',
+                                   signed=False)
+            object.__setattr__(self, "_int", value)
+            return value
 
     @property
     def base58(self):
         """Return the base58 string of the Data."""
-        value = self.int
-        b58 = ""
-
-        while value > 0:
-            i = value % 58
-            b58 = self.base58_chars[i] + b58
-            value //= 58
-
-        for b in self.bytes:
-            if b == 0:
-                b58 = self.base58_chars[0] + b58
-            else:
-                break
-
-        return b58
+        try:
+            return self._base58
+        except AttributeError:
+            codec = base58.Codec.get(self.base58_chars)
+            value = codec.encode(self.bytes)
+            object.__setattr__(self, "_base58", value)
+            return value
 
     @property
     def string(self):
@@ -64,7 +105,7 @@ class BaseData:
     def __eq__(self, other):
         """Determine the equality of two Data objects."""
         if issubclass(type(other), BaseData):
-            return self.bytes == other.bytes
+            return self.buffer == other.buffer
         else:
             return False
 
@@ -74,7 +115,7 @@ class BaseData:
 
     def __add__(self, other):
         """Concatenate two pieces of Data."""
-        d = ByteData(self.bytes + other.bytes)
+        d = ByteData(b"".join((self.buffer, other.buffer)))
         return d
 
     def __len__(self):
@@ -84,6 +125,9 @@ class BaseData:
     def __getitem__(self, key):
         """Return Data from an index or slice."""
         if type(key) is slice:
+            # Contiguous slices share this Data's buffer instead of copying.
+            if key.step in (None, 1):
+                return DataView(self, key)
             bts = self.bytes.__getitem__(key)
             return ByteData(bts)
         else:
@@ -98,29 +142,291 @@ class BaseData:
 class ByteData(BaseData):
     """A main data class that can convert between various needed data types."""
 
+    __slots__ = ()
+
     def __init__(self, b=b''):
         """Construct Data from bytes."""
         if isinstance(b, BaseData):
-            self.bytes = b.bytes
+            self._set_bytes(b.bytes)
         else:
             assert type(b) is bytes
-            self.bytes = b
+            self._set_bytes(b)
 
     def exporter(self):
         """Export as Bytes."""
         return self.bytes
 
 
+# DataView reads and fills the base slot itself.
+bytes_slot = BaseData.bytes
+
+
+class DataView(BaseData):
+    """Data that shares a slice of another Data's buffer."""
+
+    __slots__ = ("_view",)
+
+    def __init__(self, d, key=slice(None)):
+        """Construct a view of d[key] without copying its bytes."""
+        object.__setattr__(self, "_view", d.buffer[key])
+
+    @property
+    def buffer(self):
+        """Return the memoryview that the view is built on."""
+        return self._view
+
+    @property
+    def bytes(self):
+        """Return the bytes of the view, copying them only once."""
+        try:
+            return bytes_slot.__get__(self)
+        except AttributeError:
+            bts = self._view.tobytes()
+            bytes_slot.__set__(self, bts)
+            return bts
+
+    def __len__(self):
+        """Return the length in bytes."""
+        return len(self._view)
+
+    def __reduce__(self):
+        """Pickle the view as a view of a copy of its bytes."""
+        return (DataView, (ByteData(self.bytes),))
+
+    def exporter(self):
+        """Export as Bytes."""
+        return self.bytes
+
+
+class DataBuilder:
+    """Collects pieces of Data and joins them with a single copy."""
+
+    __slots__ = ("parts",)
+
+    def __init__(self, *parts):
+        """Start building from any number of pieces of Data."""
+        self.parts = [d.buffer for d in parts]
+
+    def append(self, d):
+        """Add a piece of Data to the end, returning the builder."""
+        self.parts.append(d.buffer)
+        return self
+
+    def extend(self, ds):
+        """Add several pieces of Data to the end, returning the builder."""
+        self.parts += [d.buffer for d in ds]
+        return self
+
+    def __len__(self):
+        """Return the length in bytes of the Data built so far."""
+        return sum(len(p) for p in self.parts)
+
+    def build(self):
+        """Return the pieces joined as one ByteData."""
+        return ByteData(b"".join(self.parts))
+
+
+class DataArray:
+    """Many pieces of Data of one width, stored contiguously in one buffer."""
+
+    __slots__ = ("buffer", "width")
+
+    base58_chars = BaseData.base58_chars
+
+    def __init__(self, buffer=b'', width=None):
+        """Construct from bytes, a memoryview or an (N, width) uint8 array."""
+        view = memoryview(buffer)
+        if view.itemsize != 1 or view.ndim not in (1, 2):
+            raise WidthException("Only flat or (N, width) buffers of bytes "
+                                 "split into pieces.")
+        if view.ndim == 2:
+            if width is not None and width != view.shape[1]:
+                raise WidthException("An (N, " + str(view.shape[1]) +
+                                     ") array has no pieces of " +
+                                     str(width) + ".")
+            width = view.shape[1]
+        elif width is None:
+            raise WidthException("The width of a flat buffer is needed.")
+
+        # Pieces are immutable, so buffers that can change are copied, and
+        # strided ones are packed.
+        if not view.readonly or not view.c_contiguous:
+            view = memoryview(view.tobytes())
+        view = view.cast("B")
+        if width <= 0 or len(view) % width:
+            raise WidthException(str(len(view)) + " bytes do not split "
+                                 "into pieces of " + str(width) + ".")
+        self.buffer = view
+        self.width = width
+
+    @classmethod
+    def from_data(cls, ds, width=None):
+        """Construct from an iterable of Data of the same width."""
+        parts = [d.buffer for d in ds]
+        if width is None:
+            if not parts:
+                raise WidthException("The width of no Data is unknown.")
+            width = len(parts[0])
+        if any(len(p) != width for p in parts):
+            raise WidthException("Every piece of Data must have " +
+                                 str(width) + " bytes.")
+        return cls(b"".join(parts), width)
+
+    @classmethod
+    def from_ints(cls, ints, width):
+        """Construct from an iterable of ints, padded to width bytes."""
+        try:
+            bts = b"".join(i.to_bytes(width, 'big') for i in ints)
+        except OverflowError:
+            raise WidthException("An int does not fit in " + str(width) +
+                                 " bytes.")
+        return cls(bts, width)
+
+    @property
+    def bytes(self):
+        """Return every piece of Data joined as bytes."""
+        return self.buffer.tobytes()
+
+    def rows(self):
+        """Return the list of the bytes of every piece of Data."""
+        bts = self.bytes
+        w = self.width
+        return [bts[i:i + w] for i in range(0, len(bts), w)]
+
+    def array(self):
+        """Return the pieces as an (N, width) NumPy uint8 array."""
+        numpy = base58.require_numpy()
+        a = numpy.frombuffer(self.buffer, dtype=numpy.uint8)
+        return a.reshape(len(self), self.width)
+
+    @property
+    def hex(self):
+        """Return the list of hex strings of every piece of Data."""
+        h = self.buffer.hex().upper()
+        w = self.width * 2
+        return [h[i:i + w] for i in range(0, len(h), w)]
+
+    @property
+    def int(self):
+        """Return the list of int values of every piece of Data."""
+        return [int.from_bytes(r, 'big') for r in self.rows()]
+
+    @property
+    def base58(self):
+        """Return the list of base58 strings of every piece of Data."""
+        codec = base58.Codec.get(self.base58_chars)
+        if len(self) and base58.load_numpy() is not None:
+            return codec.encode_array(self.array())
+        return [codec.encode(r) for r in self.rows()]
+
+    def __len__(self):
+        """Return the number of pieces of Data."""
+        return len(self.buffer) // self.width
+
+    def __getitem__(self, key):
+        """Return a DataView from an index, or a DataArray from a slice."""
+        w = self.width
+        if type(key) is slice:
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                return DataArray(self.buffer[start * w:max(stop, start) * w],
+                                 w)
+            rows = [self.buffer[i * w:(i + 1) * w]
+                    for i in range(start, stop, step)]
+            return DataArray(b"".join(rows), w)
+
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("DataArray index out of range")
+        return DataView(self, slice(key * w, (key + 1) * w))
+
+    def __iter__(self):
+        """Yield a DataView of every piece of Data."""
+        w = self.width
+        for i in range(0, len(self.buffer), w):
+            yield DataView(self, slice(i, i + w))
+
+    def __contains__(self, d):
+        """Return whether a piece of Data is in the array."""
+        w = self.width
+        if len(d) != w:
+            return False
+        # Search the flat buffer, skipping hits that straddle two pieces.
+        bts = self.bytes
+        target = d.bytes
+        i = bts.find(target)
+        while i != -1:
+            if i % w == 0:
+                return True
+            i = bts.find(target, i - i % w + w)
+        return False
+
+    def __eq__(self, other):
+        """Determine the equality of two DataArrays."""
+        if type(other) is DataArray:
+            return self.width == other.width and self.buffer == other.buffer
+        return False
+
+    def __hash__(self):
+        """Return the hash of the DataArray."""
+        return hash((self.width, self.bytes))
+
+    def __add__(self, other):
+        """Concatenate two DataArrays of the same width."""
+        self.check_width(other)
+        return DataArray(b"".join((self.buffer, other.buffer)), self.width)
+
+    def __reduce__(self):
+        """Pickle the DataArray by its bytes and width."""
+        return (DataArray, (self.bytes, self.width))
+
+    def __repr__(self):
+        """Represent the DataArray by its width and hex strings."""
+        return ("DataArray(width=" + str(self.width) + ", " +
+                repr(self.hex) + ")")
+
+    def check_width(self, other):
+        """Raise a WidthException if other has a different width."""
+        if self.width != other.width:
+            raise WidthException("DataArrays of widths " + str(self.width) +
+                                 " and " + str(other.width) + " differ.")
+
+    def unique(self):
+        """Return the distinct pieces of Data, in their first order."""
+        return DataArray(b"".join(dict.fromkeys(self.rows())), self.width)
+
+    def union(self, other):
+        """Return the distinct pieces of Data in either array."""
+        return (self + other).unique()
+
+    def intersection(self, other):
+        """Return the distinct pieces of Data in both arrays."""
+        self.check_width(other)
+        keep = set(other.rows())
+        rows = [r for r in dict.fromkeys(self.rows()) if r in keep]
+        return DataArray(b"".join(rows), self.width)
+
+    def difference(self, other):
+        """Return the distinct pieces of Data that other does not have."""
+        self.check_width(other)
+        drop = set(other.rows())
+        rows = [r for r in dict.fromkeys(self.rows()) if r not in drop]
+        return DataArray(b"".join(rows), self.width)
+
+
 class HexData(BaseData):
     """A separate constructor for the data class that uses hex strings."""
 
+    __slots__ = ()
+
     def __init__(self, s=""):
         """Construnct Data from a hex string."""
         if isinstance(s, BaseData):
-            self.bytes = s.bytes
+            self._set_bytes(s.bytes)
         else:
             assert type(s) is str
-            self.bytes = bytes.fromhex(s)
+            self._set_bytes(bytes.fromhex(s))
 
     def exporter(self):
         """Export as Hex."""
@@ -130,32 +436,20 @@ class HexData(BaseData):
 class Base58Data(BaseData):
     """A separate constructor for the data class that uses base58 strings."""
 
+    __slots__ = ()
+
     def __init__(self, b58=""):
         """Construct Data from a base58 string."""
         if isinstance(b58, BaseData):
-            self.bytes = b58.bytes
+            self._set_bytes(b58.bytes)
             return
 
         assert type(b58) is str
 
-        value = 0
-        place = 1
-        for c in b58[::-1]:
-            if c not in self.base58_chars:
-                raise EncodingException(c + " is not a valid base58 "
-                                        "character.")
-            value += place * self.base58_chars.find(c)
-            place *= 58
-
-        data = IntData(value)
-
-        for c in b58:
-            if c == self.base58_chars[0]:
-                data = ByteData(b'\x00') + data
-            else:
-                break
-
-        self.bytes = data.bytes
+        try:
+            self._set_bytes(base58.Codec.get(self.base58_chars).decode(b58))
+        except ValueError as e:
+            raise EncodingException(str(e))
 
     def exporter(self):
         """Export as Base58."""
@@ -165,10 +459,12 @@ class Base58Data(BaseData):
 class IntData(BaseData):
     """A separate constructor for the data class that uses ints."""
 
+    __slots__ = ()
+
     def __init__(self, i, size=0):
         """Construct Data from an int and a data size."""
         if isinstance(i, BaseData):
-            self.bytes = i.bytes
+            self._set_bytes(i.bytes)
             return
 
         assert type(i) is int
@@ -178,7 +474,7 @@ class IntData(BaseData):
         while len(byte_value) < size:
             byte_value = b'\x00' + byte_value
 
-        self.bytes = byte_value
+        self._set_bytes(byte_value)
 
     def exporter(self):
         """Export as Int."""
@@ -188,10 +484,12 @@ class IntData(BaseData):
 class StringData(BaseData):
     """A separate constructor for the data class that uses encoded strings."""
 
+    __slots__ = ()
+
     def __init__(self, s, encoding="utf-8", normalize=None):
         """Construct Data from an encoded string."""
         if isinstance(s, BaseData):
-            self.bytes = s.bytes
+            self._set_bytes(s.bytes)
             return
 
         assert type(s) is str
@@ -199,7 +497,7 @@ class StringData(BaseData):
         if normalize is not None:
             s = unicodedata.normalize(normalize, s)
         bts = s.encode(encoding)
-        self.bytes = bts
+        self._set_bytes(bts)
 
     def exporter(self):
         """Export as String."""
@@ -1,19 +1,272 @@
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric import ec
 from pyperlib import data
+import functools
+import os
+
+try:
+    from gmpy2 import invert, mpz
+except ImportError:
+    mpz = int
+
+    def invert(v, p):
+        """Return the inverse of v modulo p."""
+        return pow(v, -1, p)
 
 SECP256K1 = ec.SECP256K1
 
+# KeyPairs compute keys with OpenSSL, or with PythonEngine.
+engines = ("openssl", "python")
+default_engine = "openssl"
+
+
+class CurveParams:
+    """The domain parameters of a curve, used for raw point arithmetic."""
+
+    def __init__(self, p, a, b, n, g):
+        """Create the parameters from the field, coefficients and generator."""
+        self.p = p
+        self.a = a
+        self.b = b
+        self.n = n
+        self.g = g
+
+    def add(self, p1, p2):
+        """Add two affine points, where None is the point at infinity."""
+        if p1 is None:
+            return p2
+        if p2 is None:
+            return p1
+
+        x1, y1 = p1
+        x2, y2 = p2
+        p = self.p
+
+        if x1 == x2:
+            if (y1 + y2) % p == 0:
+                return None
+            lam = (3 * x1 * x1 + self.a) * pow(2 * y1, -1, p) % p
+        else:
+            lam = (y2 - y1) * pow(x2 - x1, -1, p) % p
+
+        x3 = (lam * lam - x1 - x2) % p
+        y3 = (lam * (x1 - x3) - y1) % p
+        return (x3, y3)
+
+    def multiply(self, k, point=None):
+        """Multiply an affine point (the generator by default) by k."""
+        if point is None:
+            point = self.g
+        result = None
+        for bit in bin(k % self.n)[2:]:
+            result = self.add(result, result)
+            if bit == "1":
+                result = self.add(result, point)
+        return result
+
+    def sqrt(self, v):
+        """Return a square root of v in the field, or None if none exists."""
+        if self.p % 4 != 3:
+            raise NotImplementedError("Only fields with p % 4 == 3 are "
+                                      "supported.")
+        root = pow(v, (self.p + 1) // 4, self.p)
+        if root * root % self.p != v % self.p:
+            return None
+        return root
+
+    def decode(self, bts):
+        """Return the affine point of SEC1 public key bytes."""
+        size = (self.p.bit_length() + 7) // 8
+        x = int.from_bytes(bts[1:size + 1], 'big')
+        if bts[0] == 4 and len(bts) == 2 * size + 1:
+            y = int.from_bytes(bts[size + 1:], 'big')
+        elif bts[0] in (2, 3) and len(bts) == size + 1:
+            y = self.sqrt(x ** 3 + self.a * x + self.b)
+            if y is None:
+                raise ValueError("The public key is not on the curve.")
+            if y % 2 != bts[0] % 2:
+                y = self.p - y
+        else:
+            raise ValueError("The public key is not in SEC1 format.")
+
+        if (y * y - x ** 3 - self.a * x - self.b) % self.p != 0:
+            raise ValueError("The public key is not on the curve.")
+        return (x, y)
+
+    def encode(self, point, compressed):
+        """Return the bytes of an affine point in SEC1 format."""
+        x, y = point
+        size = (self.p.bit_length() + 7) // 8
+        x_bytes = x.to_bytes(size, 'big')
+
+        if not compressed:
+            return b'\x04' + x_bytes + y.to_bytes(size, 'big')
+        elif y % 2 == 0:
+            return b'\x02' + x_bytes
+        else:
+            return b'\x03' + x_bytes
+
+
+curve_params = {
+    SECP256K1: CurveParams(
+        p=0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F,
+        a=0,
+        b=7,
+        n=0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141,
+        g=(0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+           0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8))
+}
+
+
+class PythonEngine:
+    """Jacobian point arithmetic with precomputed tables of the generator."""
+
+    # Values are gmpy2 mpz when it is installed, and ints otherwise.
+    window = 8
+
+    def __init__(self, params):
+        """Prepare an engine for the parameters of a curve."""
+        self.params = params
+        self.p = mpz(params.p)
+        self.a = mpz(params.a)
+        self.n = params.n
+        self.tables = None
+
+    def double(self, pt):
+        """Double a Jacobian point, where None is the point at infinity."""
+        if pt is None or not pt[1]:
+            return None
+        x, y, z = pt
+        p = self.p
+
+        yy = y * y % p
+        s = 4 * x * yy % p
+        m = 3 * x * x
+        if self.a:
+            m += self.a * pow(z, 4, p)
+        m %= p
+        x3 = (m * m - 2 * s) % p
+        y3 = (m * (s - x3) - 8 * yy * yy) % p
+        return (x3, y3, 2 * y * z % p)
+
+    def add_affine(self, pt, q):
+        """Add an affine point q to a Jacobian point pt."""
+        if q is None:
+            return pt
+        if pt is None:
+            return (q[0], q[1], mpz(1))
+        x1, y1, z1 = pt
+        x2, y2 = q
+        p = self.p
+
+        zz = z1 * z1 % p
+        h = (x2 * zz - x1) % p
+        r = (y2 * zz * z1 - y1) % p
+        if not h:
+            if not r:
+                return self.double(pt)
+            return None
+
+        hh = h * h % p
+        hhh = h * hh % p
+        v = x1 * hh % p
+        x3 = (r * r - hhh - 2 * v) % p
+        y3 = (r * (v - x3) - y1 * hhh) % p
+        return (x3, y3, z1 * h % p)
+
+    def to_affine(self, pt):
+        """Return the affine point of a Jacobian point."""
+        if pt is None:
+            return None
+        x, y, z = pt
+        p = self.p
+        zi = invert(z, p)
+        zi2 = zi * zi % p
+        return (int(x * zi2 % p), int(y * zi2 * zi % p))
+
+    def batch_affine(self, pts):
+        """Return the affine points of Jacobian points with one inversion."""
+        # Montgomery's trick: invert the product of every z, then peel each
+        # inverse off it using the products of the z before it.
+        p = self.p
+        prefix = []
+        acc = mpz(1)
+        for pt in pts:
+            prefix.append(acc)
+            if pt is not None:
+                acc = acc * pt[2] % p
+        inv = invert(acc, p)
+
+        out = [None] * len(pts)
+        for i in range(len(pts) - 1, -1, -1):
+            if pts[i] is None:
+                continue
+            x, y, z = pts[i]
+            zi = inv * prefix[i] % p
+            inv = inv * z % p
+            zi2 = zi * zi % p
+            out[i] = (int(x * zi2 % p), int(y * zi2 * zi % p))
+        return out
+
+    def build_tables(self):
+        """Precompute the multiples of the generator in every window."""
+        # tables[i][d] is d * 2 ** (window * i) times the generator, so a
+        # multiplication is one mixed addition per window and no doublings.
+        size = 1 << self.window
+        base = (mpz(self.params.g[0]), mpz(self.params.g[1]))
+        tables = []
+        for _ in range(-(-self.n.bit_length() // self.window)):
+            pts = []
+            pt = None
+            for _ in range(size):
+                pt = self.add_affine(pt, base)
+                pts.append(pt)
+            row = [None] + [(mpz(x), mpz(y)) for x, y in
+                            self.batch_affine(pts)]
+            base = row.pop()
+            tables.append(row)
+        self.tables = tables
+
+    def multiply(self, k):
+        """Return k times the generator as a Jacobian point."""
+        if self.tables is None:
+            self.build_tables()
+        k %= self.n
+        mask = (1 << self.window) - 1
+        pt = None
+        for row in self.tables:
+            pt = self.add_affine(pt, row[k & mask])
+            k >>= self.window
+        return pt
+
+
+@functools.lru_cache(maxsize=None)
+def python_engine(Curve):
+    """Return the shared PythonEngine of a curve."""
+    if Curve not in curve_params:
+        raise ValueError("The python engine does not support " +
+                         Curve.name + ".")
+    return PythonEngine(curve_params[Curve])
+
 
 class KeyPair:
     """A set of private and public keys described as Data objects."""
 
-    def __init__(self, curve, *, priv=None, pub=None):
+    # Keys made in bulk are converted to affine this many at a time.
+    batch = 4096
+
+    def __init__(self, curve, *, priv=None, pub=None, engine=None):
         """Construct a KeyPair from a curve and possibly a key."""
+        if engine is None:
+            engine = default_engine
+        if engine not in engines:
+            raise ValueError(str(engine) + " is not a valid engine.")
+        self.engine = engine
         self.curve = curve()
         self.priv = None
         self.pub_u = None
         self.pub_c = None
+        self.coords = None
 
         if priv is not None:
             self.load_priv(priv)
@@ -27,14 +280,70 @@ class KeyPair:
         self.priv = data.ByteData(b'\x00')
         # Some coins (ETH) do not allow leading zeroes in private keys.
         while self.priv.bytes[0] == 0:
-            key = ec.generate_private_key(self.curve, default_backend())
-            self.set_priv(key)
+            if self.engine == "python":
+                size = self.curve.key_size // 8
+                k = int.from_bytes(os.urandom(size), 'big')
+                if 0 < k < curve_params[type(self.curve)].n:
+                    self.set_scalar(k)
+            else:
+                key = ec.generate_private_key(self.curve, default_backend())
+                self.set_priv(key)
 
     def load_priv(self, priv):
         """Set the private/public keys from a private Data object."""
+        if self.engine == "python":
+            k = priv.int
+            if not 0 < k < curve_params[type(self.curve)].n:
+                raise ValueError("The private key is out of range.")
+            self.set_scalar(k)
+            return
         key = ec.derive_private_key(priv.int, self.curve, default_backend())
         self.set_priv(key)
 
+    @classmethod
+    def gen_many(cls, curve, n):
+        """Generate n random keys, returning DataArrays of privs and pubs."""
+        size = curve.key_size // 8
+        order = python_engine(curve).n
+        ks = []
+        # Entropy for every key is drawn at once, and the few rejected
+        # scalars (as in gen) are drawn again together.
+        while len(ks) < n:
+            buf = os.urandom((n - len(ks)) * size)
+            for i in range(0, len(buf), size):
+                k = int.from_bytes(buf[i:i + size], 'big')
+                if buf[i] != 0 and k < order:
+                    ks.append(k)
+        return cls.keys_many(curve, ks)
+
+    @classmethod
+    def load_priv_many(cls, curve, privs):
+        """Return DataArrays of privs and pubs of many private Data."""
+        order = python_engine(curve).n
+        ks = [priv.int for priv in privs]
+        if not all(0 < k < order for k in ks):
+            raise ValueError("A private key is out of range.")
+        return cls.keys_many(curve, ks)
+
+    @classmethod
+    def keys_many(cls, curve, ks):
+        """Return DataArrays of privs and uncompressed pubs of int keys."""
+        # Keys are always computed with the python engine, so that no
+        # OpenSSL key objects are made.
+        engine = python_engine(curve)
+        size = curve.key_size // 8
+        privs = []
+        pubs = []
+        for start in range(0, len(ks), cls.batch):
+            chunk = ks[start:start + cls.batch]
+            points = engine.batch_affine([engine.multiply(k) for k in chunk])
+            for k, (x, y) in zip(chunk, points):
+                privs.append(k.to_bytes(size, 'big'))
+                pubs.append(b'\x04' + x.to_bytes(size, 'big') +
+                            y.to_bytes(size, 'big'))
+        return (data.DataArray(b''.join(privs), size),
+                data.DataArray(b''.join(pubs), 2 * size + 1))
+
     def load_pub(self, pub):
         """Set the public keys from a public Data object."""
         t = pub[0].hex
@@ -62,6 +371,12 @@ class KeyPair:
 
         assert len(self.priv) == self.curve.key_size // 8
 
+    def set_scalar(self, k):
+        """Set the private/public keys from an int with the python engine."""
+        engine = python_engine(type(self.curve))
+        self.priv = data.IntData(k, self.curve.key_size // 8)
+        self.set_pub(*engine.to_affine(engine.multiply(k)))
+
     def set_pub(self, x, y):
         """Set the public keys from x and y coordinates."""
         coord_size = (self.curve.key_size // 8)
@@ -73,14 +388,39 @@ class KeyPair:
         else:
             prefix = b'\x03'
 
-        uncompressed = data.ByteData(b'\x04') + x_data + y_data
+        uncompressed = data.DataBuilder(data.ByteData(b'\x04'), x_data,
+                                        y_data).build()
         compressed = data.ByteData(prefix) + x_data
         self.pub_u = uncompressed
         self.pub_c = compressed
+        self.coords = (x, y)
 
         assert len(self.pub_u) == self.curve.key_size // 4 + 1
         assert len(self.pub_c) == self.curve.key_size // 8 + 1
 
+    def point(self):
+        """Return the public key as an affine (x, y) tuple of ints."""
+        if self.coords is None and self.pub_c is not None:
+            params = curve_params[type(self.curve)]
+            return params.decode(self.pub_c.bytes)
+        return self.coords
+
+    def combine(self, other):
+        """Return the KeyPair of the sum of this key and other."""
+        Curve = type(self.curve)
+        params = curve_params[Curve]
+        if self.priv is not None and other.priv is not None:
+            k = (self.priv.int + other.priv.int) % params.n
+            size = self.curve.key_size // 8
+            return KeyPair(Curve, priv=data.IntData(k, size),
+                           engine=self.engine)
+
+        point = params.add(self.point(), other.point())
+        if point is None:
+            raise ValueError("The keys add up to the point at infinity.")
+        pub = data.ByteData(params.encode(point, False))
+        return KeyPair(Curve, pub=pub, engine=self.engine)
+
     def pub(self, compressed):
         """Return a compressed or uncompressed public Data object."""
         if compressed:
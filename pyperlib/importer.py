@@ -1,4 +1,5 @@
-from pyperlib import data, mods, helper, vanity
+from pyperlib import data, mods, helper, vanity, coins, cluster, ec, coinutil
+from multiprocessing import cpu_count
 
 
 class ImporterFactory(helper.NameFactory):
@@ -12,12 +13,22 @@ class BaseImporter:
     """Import using args, rather than external sources."""
 
     description = "no description"
+    settings = []
 
-    def __init__(self, Coin, prompt=None):
-        """Initializes the importer with a Coin class."""
+    def __init__(self, Coin, prompt=None, **kwargs):
+        """Initializes the importer with a Coin class and its settings."""
         self.Coin = Coin
         self.prompt = prompt
 
+        names = [s.name for s in self.settings]
+        self.coin_kwargs = {k: v for k, v in kwargs.items() if k not in names}
+
+        for s in self.settings:
+            value = kwargs.get(s.name)
+            if value is None:
+                value = s.default
+            setattr(self, s.name, value)
+
     def run(self, **kwargs):
         """Returns the result of creating a Coin with kwargs."""
         return self.Coin(**kwargs, prompt=self.prompt)
@@ -64,12 +75,134 @@ class VanityImporter(BaseImporter):
     """Generate a vanity address."""
 
     description = "generate a vanity address"
+    settings = [
+        coins.Setting("jobs", int, cpu_count(), "the number of processes \
+used to search for vanity addresses"),
+        coins.Setting("mode", str, "prefix", "where a vanity pattern must \
+appear in the address: " + ", ".join(vanity.modes)),
+        coins.Setting("case", bool, False, "whether vanity patterns are \
+case-sensitive"),
+        coins.Setting("budget", float, 0, "refuse vanity searches expected \
+to take more keys than this (0 for no limit)"),
+        coins.Setting("both", bool, False, "whether vanity search checks \
+both the compressed and uncompressed address of each key"),
+        coins.Setting("state", str, None, "a file to checkpoint the vanity \
+search to, and to resume it from"),
+        coins.Setting("coordinate", str, None, "a host:port or socket path \
+to hand the vanity search out to vanitynode.py nodes from"),
+        coins.Setting("authkey", str, None, "the secret shared by the vanity \
+coordinator and its nodes"),
+        coins.Setting("split", str, None, "a public key to search for a \
+vanity offset of, so that only its owner can spend the address"),
+        coins.Setting("also", str, None, "more coins to search the same \
+vanity keys for, separated by commas"),
+        coins.Setting("timeout", float, 0, "stop the vanity search after this \
+many seconds and use the closest address found (0 for no limit)"),
+        coins.Setting("max_keys", float, 0, "stop the vanity search after \
+trying this many keys and use the closest address found (0 for no limit)")
+        ]
 
     def run(self, pattern=None):
-        """Generate an address that matches pattern."""
+        """Generate an address that matches any of the given patterns."""
         if pattern is None:
-            pattern = self.prompt.prompt_info(name="Pattern", type_f=str)
-        
-        generator = vanity.Generator(self.Coin)
-        priv = generator.run(pattern).priv
-        return super().run(key=priv)
+            desc = "Separate multiple patterns with commas or spaces."
+            pattern = self.prompt.prompt_info(name="Pattern", desc=desc,
+                                              type_f=str)
+        patterns = pattern.replace(",", " ").split()
+
+        # An explicit compression setting decides which address is wanted.
+        compression = self.coin_kwargs.get("compression")
+        if compression is None and not self.both:
+            compression = True
+
+        split = None
+        if self.split:
+            # The offset is the only way to spend from a split-key match.
+            if self.prompt is None:
+                raise ValueError("A split-key search needs a prompt to "
+                                 "show the offset.")
+            split = ec.KeyPair(self.Coin.curve, pub=data.HexData(self.split))
+
+        pool = None
+        if self.coordinate:
+            pool = cluster.RemotePool(self.coordinate, self.authkey)
+
+        Coins = [self.Coin]
+        if self.also:
+            for name in self.also.replace(",", " ").split():
+                Coin = coinutil.CoinFactory.get(name)
+                if Coin is None:
+                    raise ValueError(name + " is not a known coin.")
+                Coins.append(Coin)
+
+        generator = vanity.Generator(Coins, jobs=self.jobs,
+                                     mode=self.mode, case=self.case,
+                                     budget=self.budget,
+                                     compression=compression,
+                                     state=self.state, pool=pool,
+                                     split=split, timeout=self.timeout or None,
+                                     max_keys=self.max_keys or None, top=1)
+        try:
+            if self.prompt is None:
+                matches = generator.run(patterns)
+            else:
+                matches = generator.run(patterns,
+                                        progress=self.prompt.show_progress)
+                self.prompt.end_progress()
+        finally:
+            if pool is not None:
+                pool.close()
+
+        if not matches:
+            raise vanity.BudgetException("No address matched any part of the "
+                                         "patterns within the budget.")
+        match = matches[0]
+        if match.score < len(match.pattern) and self.prompt is not None:
+            self.prompt.show_info("Closest match", "{} of {} characters of "
+                                  "{}".format(match.score, len(match.pattern),
+                                              match.pattern))
+        if split is None:
+            key = match.priv
+        else:
+            # Only the offset is known here; the owner of the split key
+            # adds it to their secret with the combine importer. Its WIF
+            # carries the compression of the matched address.
+            offset = match.Coin(key=match.offset.priv)
+            if match.compression is not None:
+                offset.apply_settings(compression=match.compression)
+            self.prompt.show_info("Split offset", offset.wif_string())
+            key = match.keypair.pub(bool(match.compression)).hex
+        coin = match.Coin(key=key, prompt=self.prompt)
+
+        if match.compression is not None:
+            coin.apply_settings(compression=match.compression)
+        return coin
+
+
+class CombineImporter(BaseImporter):
+    """Combine a private key with the offset of a split-key vanity search."""
+
+    description = "combine a private key with a split vanity offset"
+
+    def run(self, key=None, offset=None):
+        """Return a coin whose private key is the sum of key and offset."""
+        if key is None:
+            key = self.prompt.prompt_pass(name="Key", type_f=str,
+                                          repeat=False)
+        if offset is None:
+            offset = self.prompt.prompt_info(name="Split offset",
+                                             type_f=str)
+
+        base = self.Coin(key=key, prompt=self.prompt)
+        if base.keypair is None or base.keypair.priv is None:
+            raise ValueError("A private key is needed to combine with.")
+
+        offset = self.Coin(key=offset, prompt=self.prompt)
+        if offset.keypair is None or offset.keypair.priv is None:
+            raise ValueError("The split offset must be a private key.")
+
+        coin = super().run(key=base.keypair.combine(offset.keypair).priv)
+        if self.Coin.compressible:
+            compression = offset.get_settings().compression
+            coin.apply_settings(compression=compression)
+        return coin
@@ -1,20 +1,610 @@
-from pyperlib import data
+from pyperlib import data, purehash
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import hashlib
-import sha3
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
+import time
 
 
 class LengthError(Exception):
     """An Exception that occurs when Data is of improper length."""
 
 
+class BackendError(Exception):
+    """An Exception that occurs when no backend can run an algorithm."""
+
+
+class Backend:
+    """One implementation of an algorithm that mods can run."""
+
+    def __init__(self, algorithm, name, load, releases_gil=True):
+        """Describe a backend whose implementation load() returns."""
+        self.algorithm = algorithm
+        self.name = name
+        self.load = load
+        self.releases_gil = releases_gil
+        self.impl = None
+        self.time = None
+        self.error = None
+
+    def probe(self):
+        """Load and check the backend, returning whether it works."""
+        probe, expected = probes[self.algorithm]
+        try:
+            impl = self.load()
+            result = probe(impl)
+        except Exception as e:
+            # Missing modules, and OpenSSL builds without an algorithm,
+            # fail in many ways; any failure makes a backend unusable.
+            self.error = str(e) or type(e).__name__
+            return False
+        if result.hex() != expected:
+            self.error = "wrong result"
+            return False
+        self.impl = impl
+        self.error = None
+        return True
+
+    def benchmark(self, rounds):
+        """Time the backend's probe, keeping the fastest of rounds."""
+        probe = probes[self.algorithm][0]
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            probe(self.impl)
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        self.time = best
+
+
+backends = {}
+selected = {}
+bench_rounds = 10
+
+
+def register(algorithm, name, releases_gil=True):
+    """Register the decorated loader as a backend of algorithm."""
+    def decorator(load):
+        """Add the backend and return load unchanged."""
+        backend = Backend(algorithm, name, load, releases_gil)
+        backends.setdefault(algorithm, []).append(backend)
+        return load
+    return decorator
+
+
+def select(algorithm, name=None):
+    """Pick the fastest working backend of algorithm, or the named one."""
+    if algorithm not in backends:
+        raise BackendError(algorithm + " is not a known algorithm.")
+    candidates = [b for b in backends[algorithm] if name in (None, b.name)]
+    working = [b for b in candidates if b.probe()]
+    if not working:
+        tried = ", ".join(b.name + " (" + str(b.error) + ")"
+                          for b in candidates)
+        raise BackendError("No backend of " + algorithm + " works. Tried: " +
+                           (tried or "none") + ".")
+
+    for b in working:
+        b.benchmark(bench_rounds)
+    best = min(working, key=lambda b: b.time)
+    selected[algorithm] = best
+
+    # Hashes are module globals, so that hot paths call them directly.
+    if algorithm in hash_algorithms:
+        globals()[algorithm] = best.impl
+    return best.impl
+
+
+def backend(algorithm):
+    """Return the implementation of algorithm, selecting one if needed."""
+    b = selected.get(algorithm)
+    if b is None:
+        return select(algorithm)
+    return b.impl
+
+
+def report():
+    """Return a line per algorithm about its backend and the others tried."""
+    lines = []
+    for algorithm in backends:
+        try:
+            backend(algorithm)
+        except BackendError as e:
+            lines.append(algorithm + ": " + str(e))
+            continue
+        others = []
+        for b in backends[algorithm]:
+            if b.time is not None:
+                others.append(b.name + " " + format_time(b.time))
+            else:
+                others.append(b.name + " unavailable")
+        lines.append(algorithm + ": " + selected[algorithm].name +
+                     " (" + ", ".join(others) + ")")
+    return lines
+
+
+def format_time(seconds):
+    """Return a benchmark time in microseconds."""
+    return "{:.1f}us".format(seconds * 1e6)
+
+
+class CryptographyHash:
+    """A hash from the cryptography package with the hashlib interface."""
+
+    def __init__(self, algorithm, bts=b'', ctx=None):
+        """Start a hash of algorithm with some bytes, or continue ctx."""
+        if ctx is None:
+            from cryptography.hazmat.primitives import hashes
+            ctx = hashes.Hash(algorithm)
+        self.ctx = ctx
+        self.update(bts)
+
+    def update(self, bts):
+        """Add a bytes-like object to the hash."""
+        self.ctx.update(bytes(bts))
+
+    def digest(self):
+        """Return the hash of the bytes so far."""
+        return self.ctx.copy().finalize()
+
+    def copy(self):
+        """Return a copy of the hash in its current state."""
+        return CryptographyHash(None, ctx=self.ctx.copy())
+
+
+def hash_probe(new):
+    """Hash a fixed input with the constructor new, in two parts."""
+    h = new(bytes(range(32)))
+    h.update(bytes(range(32, 64)))
+    return h.digest()
+
+
+def scrypt_probe(scrypt):
+    """Derive a key from fixed inputs with cheap parameters."""
+    return scrypt(b"password", b"salt", 16, 1, 1, 32)
+
+
+def aes_probe(aes):
+    """Encrypt and decrypt the FIPS-197 AES-256 example block."""
+    key = bytes(range(32))
+    block = bytes.fromhex("00112233445566778899AABBCCDDEEFF")
+    enc = aes(key, block, True)
+    return enc + aes(key, enc, False)
+
+
+probes = {
+    "sha256": (hash_probe, "fdeab9acf3710362bd2658cdc9a29e8f"
+                           "9c757fcf9811603a8c447cd1d9151108"),
+    "ripemd160": (hash_probe, "2581f5e9f957b44b0fa24d31996de47409dd1e0f"),
+    "keccak256": (hash_probe, "002030bde3d4cf89919649775cd71875"
+                              "c4d0ab1708a380e03fefc3a28aa24831"),
+    "scrypt": (scrypt_probe, "45133c3dfba48c82235df51a53499241"
+                             "10eee893752f0d4168d2e2aee5722d82"),
+    "aes256": (aes_probe, "8ea2b7ca516745bfeafc49904b496089"
+                          "00112233445566778899aabbccddeeff")}
+hash_algorithms = ["sha256", "ripemd160", "keccak256"]
+
+
+@register("sha256", "hashlib")
+def load_hashlib_sha256():
+    """Return the OpenSSL sha256 of hashlib."""
+    return hashlib.sha256
+
+
+@register("sha256", "cryptography")
+def load_cryptography_sha256():
+    """Return the sha256 of the cryptography package."""
+    from cryptography.hazmat.primitives import hashes
+    return functools.partial(CryptographyHash, hashes.SHA256())
+
+
+@register("sha256", "pycryptodome")
+def load_pycryptodome_sha256():
+    """Return the sha256 of pycryptodome."""
+    from Crypto.Hash import SHA256
+    return SHA256.new
+
+
+@register("ripemd160", "hashlib")
+def load_hashlib_ripemd160():
+    """Return the ripemd160 of hashlib, if OpenSSL provides one."""
+    # Copying a prepared hasher is faster than finding it by name.
+    prototype = hashlib.new('ripemd160')
+
+    def ripemd160(bts=b''):
+        """Start a hashlib ripemd160 with some bytes."""
+        h = prototype.copy()
+        if bts:
+            h.update(bts)
+        return h
+    return ripemd160
+
+
+@register("ripemd160", "cryptography")
+def load_cryptography_ripemd160():
+    """Return the ripemd160 of the cryptography package."""
+    from cryptography.hazmat.primitives import hashes
+    return functools.partial(CryptographyHash, hashes.RIPEMD160())
+
+
+@register("ripemd160", "pycryptodome")
+def load_pycryptodome_ripemd160():
+    """Return the ripemd160 of pycryptodome."""
+    from Crypto.Hash import RIPEMD160
+    return RIPEMD160.new
+
+
+@register("ripemd160", "pure", releases_gil=False)
+def load_pure_ripemd160():
+    """Return the pure-Python ripemd160."""
+    return purehash.Ripemd160
+
+
+@register("keccak256", "pysha3")
+def load_pysha3_keccak256():
+    """Return the keccak256 of pysha3."""
+    import sha3
+    return sha3.keccak_256
+
+
+@register("keccak256", "pycryptodome")
+def load_pycryptodome_keccak256():
+    """Return the keccak256 of pycryptodome."""
+    from Crypto.Hash import keccak
+
+    def keccak256(bts=b''):
+        """Start a pycryptodome keccak256 with some bytes."""
+        return keccak.new(data=bts, digest_bits=256)
+    return keccak256
+
+
+@register("keccak256", "pure", releases_gil=False)
+def load_pure_keccak256():
+    """Return the pure-Python keccak256."""
+    return purehash.Keccak256
+
+
+@register("scrypt", "hashlib")
+def load_hashlib_scrypt():
+    """Return the OpenSSL scrypt of hashlib."""
+    def scrypt(password, salt, n, r, p, dklen):
+        """Derive a key with hashlib."""
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p,
+                              dklen=dklen)
+    return scrypt
+
+
+@register("scrypt", "cryptography")
+def load_cryptography_scrypt():
+    """Return the scrypt of the cryptography package."""
+    from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+    def scrypt(password, salt, n, r, p, dklen):
+        """Derive a key with cryptography."""
+        return Scrypt(salt=salt, length=dklen, n=n, r=r, p=p).derive(password)
+    return scrypt
+
+
+@register("scrypt", "pycryptodome")
+def load_pycryptodome_scrypt():
+    """Return the scrypt of pycryptodome."""
+    from Crypto.Protocol import KDF
+
+    def scrypt(password, salt, n, r, p, dklen):
+        """Derive a key with pycryptodome."""
+        return KDF.scrypt(password, salt, dklen, n, r, p)
+    return scrypt
+
+
+@register("aes256", "cryptography")
+def load_cryptography_aes256():
+    """Return AES-256 in ECB mode from the cryptography package."""
+    from cryptography.hazmat.primitives.ciphers import (Cipher, algorithms,
+                                                        modes)
+
+    def aes(key, blocks, encrypt):
+        """Encrypt or decrypt blocks with cryptography."""
+        cipher = Cipher(algorithms.AES(key), modes.ECB())
+        if encrypt:
+            context = cipher.encryptor()
+        else:
+            context = cipher.decryptor()
+        return context.update(blocks) + context.finalize()
+    return aes
+
+
+@register("aes256", "pycryptodome")
+def load_pycryptodome_aes256():
+    """Return AES-256 in ECB mode from pycryptodome."""
+    from Crypto.Cipher import AES
+
+    def aes(key, blocks, encrypt):
+        """Encrypt or decrypt blocks with pycryptodome."""
+        cipher = AES.new(key, AES.MODE_ECB)
+        if encrypt:
+            return cipher.encrypt(blocks)
+        return cipher.decrypt(blocks)
+    return aes
+
+
+# The hashes are picked when mods is imported, after a short benchmark.
+sha256 = select("sha256")
+ripemd160 = select("ripemd160")
+keccak256 = select("keccak256")
+
+
+def hash160(bts):
+    """Return the ripemd160 of the sha256 of a bytes-like object."""
+    return ripemd160(sha256(bts).digest()).digest()
+
+
+def double_sha256(bts):
+    """Return the sha256 of the sha256 of a bytes-like object."""
+    return sha256(sha256(bts).digest()).digest()
+
+
+def prototype(new):
+    """Return a function that starts an empty hash as cheaply as it can."""
+    h = new()
+    if hasattr(h, "copy"):
+        return h.copy
+    return new
+
+
+def buffers(items):
+    """Return a list of buffers from a DataArray, Data or bytes-likes."""
+    if isinstance(items, data.DataArray):
+        view, w = items.buffer, items.width
+        return [view[i:i + w] for i in range(0, len(view), w)]
+    return [i.buffer if isinstance(i, data.BaseData) else i for i in items]
+
+
+# hashlib holds the GIL while hashing anything shorter than this, so
+# threads cannot hash short inputs side by side. hash_many only uses
+# threads when every backend releases the GIL and every item is at least
+# this long; keys and digests are far shorter, so they stay on one
+# thread whatever threads is.
+gil_minsize = 2048
+
+
+def chain_hashes(bufs, algorithms):
+    """Return the joined digests of every buffer, hashed by each algorithm."""
+    starts = [prototype(globals()[a]) for a in algorithms]
+    out = []
+    for bts in bufs:
+        for start in starts:
+            h = start()
+            h.update(bts)
+            bts = h.digest()
+        out.append(bts)
+    return b"".join(out)
+
+
+def hash_many(items, algorithms, threads=None):
+    """Return a DataArray of items hashed by each of algorithms in turn."""
+    bufs = buffers(items)
+    if not bufs:
+        return data.DataArray(b'', len(chain_hashes([b''], algorithms)))
+
+    gil_free = (all(selected[a].releases_gil for a in algorithms) and
+                min(len(b) for b in bufs) >= gil_minsize)
+    if gil_free and threads is not None and 1 < threads < len(bufs):
+        step = -(-len(bufs) // threads)
+        chunks = [bufs[i:i + step] for i in range(0, len(bufs), step)]
+        with ThreadPoolExecutor(threads) as pool:
+            parts = pool.map(chain_hashes, chunks,
+                             [algorithms] * len(chunks))
+            bts = b"".join(parts)
+    else:
+        bts = chain_hashes(bufs, algorithms)
+    return data.DataArray(bts, len(bts) // len(bufs))
+
+
+def sha256_many(items, threads=None):
+    """Return a DataArray of the sha256 of every item."""
+    return hash_many(items, ["sha256"], threads)
+
+
+def double_sha256_many(items, threads=None):
+    """Return a DataArray of the double sha256 of every item."""
+    return hash_many(items, ["sha256", "sha256"], threads)
+
+
+def hash160_many(items, threads=None):
+    """Return a DataArray of the hash160 of every item."""
+    return hash_many(items, ["sha256", "ripemd160"], threads)
+
+
+def keccak_many(items, threads=None):
+    """Return a DataArray of the keccak256 of every item."""
+    return hash_many(items, ["keccak256"], threads)
+
+
+class RecipeError(Exception):
+    """An Exception that occurs when a Recipe cannot be compiled or run."""
+
+
+class Step:
+    """A step of a Recipe, computed from the results of other steps."""
+
+    __slots__ = ("kind", "value", "args")
+
+    def __init__(self, kind, value, args=()):
+        """Create a step of a kind, with a value and argument steps."""
+        self.kind = kind
+        self.value = value
+        self.args = tuple(args)
+
+    @property
+    def key(self):
+        """Return a key that steps computing the same thing share."""
+        return (self.kind, self.value) + tuple(a.key for a in self.args)
+
+    def __add__(self, other):
+        """Return a step that joins two steps."""
+        parts = []
+        for step in (self, other):
+            if step.kind == "call" and step.value is join_bytes:
+                parts += step.args
+            else:
+                parts.append(step)
+        return Step("call", join_bytes, parts)
+
+    def __getitem__(self, key):
+        """Return a step that slices this one."""
+        if type(key) is not slice:
+            raise RecipeError("Recipe steps can only be sliced.")
+        return Step("call", slicer(key.start, key.stop, key.step), (self,))
+
+    def hashed(self, *algorithms):
+        """Return a step that hashes this one with each algorithm in turn."""
+        return Step("call", hasher(algorithms), (self,))
+
+    def checksum(self, length=4):
+        """Return a step that appends a double sha256 checksum to this one."""
+        return self + self.hashed("sha256", "sha256")[:length]
+
+    def apply(self, fn):
+        """Return a step that runs fn on the bytes of this one."""
+        return Step("call", fn, (self,))
+
+
+def source(name):
+    """Return a step that takes the input called name."""
+    return Step("input", name)
+
+
+def attr(name):
+    """Return a step that takes an attribute of the Coin, like a version."""
+    return Step("attr", name)
+
+
+def const(bts):
+    """Return a step of constant bytes."""
+    return Step("const", bytes(bts))
+
+
+def join_bytes(*parts):
+    """Return bytes-like parts joined together."""
+    return b"".join(parts)
+
+
+@functools.lru_cache(maxsize=None)
+def slicer(start, stop, step):
+    """Return a function slicing bytes, shared by equal slices."""
+    def cut(bts):
+        """Slice the bytes."""
+        return bts[start:stop:step]
+    return cut
+
+
+@functools.lru_cache(maxsize=None)
+def hasher(algorithms):
+    """Return a function hashing bytes, shared by equal algorithms."""
+    if algorithms == ("sha256", "ripemd160"):
+        return hash160
+    if algorithms == ("sha256", "sha256"):
+        return double_sha256
+
+    def run(bts):
+        """Hash the bytes with the selected backends."""
+        for algorithm in algorithms:
+            bts = globals()[algorithm](bts).digest()
+        return bts
+    return run
+
+
+class Recipe:
+    """Named derivations built from Steps, compiled once per Coin."""
+
+    def __init__(self, **outputs):
+        """Create a recipe from a Step for every output name."""
+        self.outputs = outputs
+        self.compiled = {}
+
+    def compile(self, Coin, *names):
+        """Return a function of the inputs that gives the bytes of names."""
+        key = (Coin,) + names
+        fused = self.compiled.get(key)
+        if fused is None:
+            fused = self.build(Coin, names)
+            self.compiled[key] = fused
+        return fused
+
+    def build(self, Coin, names):
+        """Order the steps that names need, computing each one once."""
+        slots = {}
+        consts = []
+        inputs = {}
+        ops = []
+
+        def visit(step):
+            """Give step a slot after the steps it needs, returning it."""
+            key = step.key
+            if key in slots:
+                return slots[key]
+
+            args = [visit(a) for a in step.args]
+            if step.kind == "input":
+                value = None
+            elif step.kind == "attr":
+                value = getattr(Coin, step.value, None)
+                if value is None:
+                    raise RecipeError(Coin.name + " has no " + step.value +
+                                      " for its recipe.")
+                value = bytes(value.buffer)
+            elif step.kind == "const":
+                value = step.value
+            elif all(consts[a] is not None for a in args):
+                # Steps of constants, like joined versions, are done now.
+                value = step.value(*[consts[a] for a in args])
+            else:
+                value = None
+
+            slot = len(consts)
+            consts.append(value)
+            slots[key] = slot
+            if step.kind == "input":
+                inputs[step.value] = slot
+            elif value is None:
+                ops.append((slot, step.value, args))
+            return slot
+
+        try:
+            outs = [visit(self.outputs[name]) for name in names]
+        except KeyError as e:
+            raise RecipeError("The recipe has no output " + str(e) + ".")
+
+        # The steps become one straight-line function, so that running a
+        # recipe costs no more than the hand-written chain of calls.
+        namespace = {}
+        lines = []
+        for name, slot in inputs.items():
+            if not name.isidentifier():
+                raise RecipeError(name + " is not a valid input name.")
+            lines.append("    v%d = %s" % (slot, name))
+        for slot, fn, args in ops:
+            namespace["f%d" % slot] = fn
+            lines.append("    v%d = f%d(%s)" % (slot, slot, ", ".join(
+                "v%d" % a for a in args)))
+        for slot, value in enumerate(consts):
+            if value is not None:
+                namespace["v%d" % slot] = value
+        lines.append("    return (%s,)" % ", ".join("v%d" % o for o in outs))
+
+        source = "def fused(%s):\n" % ", ".join(inputs) + "\n".join(lines)
+        exec(compile(source, "<recipe>", "exec"), namespace)
+        return namespace["fused"]
+
+
 class Mod(data.ByteData):
     """The base class for Mods that alter Data through construnction."""
 
+    __slots__ = ()
+
     def __init__(self, *args):
         """Construnct the mod and run mod(*args)."""
-        self.bytes = self.mod(*args).bytes
+        self._set_bytes(self.mod(*args).bytes)
 
     def mod(self, d):
         """Execute the mod."""
@@ -24,10 +614,12 @@ class Mod(data.ByteData):
 class HashMod(Mod):
     """An abstract Mod that gets a hash of Data."""
 
+    __slots__ = ()
+
     def mod(self, d):
         """Execute the hash."""
         h = self.algorithm()
-        h.update(d.bytes)
+        h.update(d.buffer)
         bts = h.digest()
         return data.ByteData(bts)
 
@@ -35,38 +627,68 @@ class HashMod(Mod):
 class Sha256(HashMod):
     """A HashMod using sha256."""
 
+    __slots__ = ()
+
     def algorithm(self):
         """Execute the hash."""
-        return hashlib.new('sha256')
+        return sha256()
 
 
 class Ripemd160(HashMod):
     """A HashMod using ripemd160."""
 
+    __slots__ = ()
+
     def algorithm(self):
         """Execute the hash."""
-        return hashlib.new('ripemd160')
+        return ripemd160()
 
 
 class Keccak(HashMod):
     """A HashMod using keccak (NOT SHA3)."""
 
+    __slots__ = ()
+
     def algorithm(self):
         """Execute the hash."""
-        return sha3.keccak_256()
+        return keccak256()
+
+
+class Hash160(Mod):
+    """A Mod that gets the ripemd160 of the sha256 of Data."""
+
+    __slots__ = ()
+
+    def mod(self, d):
+        """Execute the hashes."""
+        return data.ByteData(hash160(d.buffer))
+
+
+class DoubleSha256(Mod):
+    """A Mod that gets the sha256 of the sha256 of Data."""
+
+    __slots__ = ()
+
+    def mod(self, d):
+        """Execute the hashes."""
+        return data.ByteData(double_sha256(d.buffer))
 
 
 class Concat(Mod):
     """A Mod that concats two pieces of Data."""
 
+    __slots__ = ()
+
     def mod(self, *args):
         """Execute the mod."""
-        return sum(args, data.ByteData())
+        return data.DataBuilder(*args).build()
 
 
 class Xor(Mod):
     """A Mod that performs xor on two pieces of Data."""
 
+    __slots__ = ()
+
     def mod(self, d1, d2):
         """Execute the mod."""
         if len(d1) != len(d2):
@@ -79,6 +701,8 @@ class Xor(Mod):
 class Slice(Mod):
     """A Mod that performs slicing on Data."""
 
+    __slots__ = ()
+
     def mod(self, d, i=None, j=None, k=None):
         """Execute the mod."""
         return d[i:j:k]
@@ -87,42 +711,41 @@ class Slice(Mod):
 class Scrypt(Mod):
     """A Mod that performs SCrypt key derivation for bip38."""
 
+    __slots__ = ()
+
     def mod(self, password, salt):
         """Execute the mod."""
-        bts = hashlib.scrypt(password.bytes, salt=salt.bytes,
-                             n=16384, r=8, p=8, dklen=64)
+        scrypt = backend("scrypt")
+        bts = scrypt(password.bytes, salt.bytes, 16384, 8, 8, 64)
         return data.ByteData(bts)
 
 
 class Aes256(Mod):
     """A base Mod for aes256 operations."""
 
-    def cipher(self, key):
-        """Return a Cipher object for given key Data."""
-        alg = algorithms.AES(key.bytes)
-        mode = modes.ECB()
-        return Cipher(alg, mode, backend=default_backend())
+    __slots__ = ()
 
-    def run_cipher(self, context, block):
-        """Return Data from running an action on a Cipher object."""
-        result = context.update(block.bytes)
-        result += context.finalize()
-        return data.ByteData(result)
+    def run_cipher(self, block, key, encrypt):
+        """Return Data from encrypting or decrypting block with key."""
+        aes = backend("aes256")
+        return data.ByteData(aes(key.bytes, block.bytes, encrypt))
 
 
 class Aes256Enc(Aes256):
     """A Mod that encrypts aes256."""
 
+    __slots__ = ()
+
     def mod(self, block, key):
         """Execute the mod."""
-        context = self.cipher(key).encryptor()
-        return self.run_cipher(context, block)
+        return self.run_cipher(block, key, True)
 
 
 class Aes256Dec(Aes256):
     """A Mod that decrypts aes256."""
 
+    __slots__ = ()
+
     def mod(self, block, key):
         """Execute the mod."""
-        context = self.cipher(key).decryptor()
-        return self.run_cipher(context, block)
+        return self.run_cipher(block, key, False)
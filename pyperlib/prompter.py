@@ -1,5 +1,7 @@
 from getpass import getpass
 from PyQt5.QtWidgets import QWidget, QInputDialog, QMessageBox, QLineEdit
+from PyQt5.QtWidgets import QApplication, QProgressDialog
+import sys
 import traceback
 
 
@@ -40,10 +42,22 @@ class BasePrompter:
         """Show an error to the user."""
         raise NotImplementedError("Prompter does not support error showing.")
 
+    def show_info(self, name, info):
+        """Show a piece of information that is not part of the coin."""
+        raise NotImplementedError("Prompter does not support info showing.")
+
+    def show_progress(self, progress):
+        """Show the progress of a long-running task, if supported."""
+
+    def end_progress(self):
+        """Stop showing the progress of a finished task."""
+
 
 class CliPrompter(BasePrompter):
     """Grab info from the user using stdin."""
 
+    progress_width = 0
+
     def pass_input(self, prompt):
         """Securely ask the user for a password."""
         return getpass(prompt=prompt)
@@ -119,10 +133,29 @@ class CliPrompter(BasePrompter):
             if msg != "":
                 print(msg)
 
+    def show_info(self, name, info):
+        """Print a piece of information in the command line."""
+        print(name + ": " + str(info))
+
+    def show_progress(self, progress):
+        """Overwrite the progress line on stderr."""
+        msg = str(progress)
+        width = max(len(msg), self.progress_width)
+        self.progress_width = width
+        print("\r" + msg.ljust(width), end="", file=sys.stderr)
+
+    def end_progress(self):
+        """End the progress line on stderr."""
+        if self.progress_width > 0:
+            print("", file=sys.stderr)
+            self.progress_width = 0
+
 
 class GuiPrompter(BasePrompter, QWidget):
     """Prompt the user through a qt dialog."""
 
+    progress_dialog = None
+
     def get_text(self, name, prompt, **kwargs):
         """Run an InputDialog to get some text back."""
         return QInputDialog.getText(self, name + ' prompt', prompt, **kwargs)
@@ -195,3 +228,27 @@ class GuiPrompter(BasePrompter, QWidget):
         tpe = self.error_type(e)
         msg = "Error: " + str(e)
         self.show_text(tpe, msg)
+
+    def show_info(self, name, info):
+        """Show a piece of information in a QMessageBox."""
+        self.show_text(name, str(info))
+
+    def show_progress(self, progress):
+        """Update a QProgressDialog with the chance of being done."""
+        if self.progress_dialog is None:
+            self.progress_dialog = QProgressDialog("", None, 0, 100, self)
+            self.progress_dialog.setWindowTitle("Progress")
+            self.progress_dialog.show()
+
+        chance = progress.chance
+        if chance is None:
+            chance = 0
+        self.progress_dialog.setLabelText(str(progress))
+        self.progress_dialog.setValue(min(int(chance * 100), 99))
+        QApplication.processEvents()
+
+    def end_progress(self):
+        """Close the QProgressDialog."""
+        if self.progress_dialog is not None:
+            self.progress_dialog.close()
+            self.progress_dialog = None
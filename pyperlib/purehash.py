@@ -0,0 +1,221 @@
+import struct
+
+# Pure-Python hashes for when no compiled implementation is installed.
+# They keep the hashlib interface so that mods can use them interchangeably.
+
+mask64 = (1 << 64) - 1
+mask32 = (1 << 32) - 1
+
+keccak_rounds = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A,
+    0x8000000080008000, 0x000000000000808B, 0x0000000080000001,
+    0x8000000080008081, 0x8000000000008009, 0x000000000000008A,
+    0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089,
+    0x8000000000008003, 0x8000000000008002, 0x8000000000000080,
+    0x000000000000800A, 0x800000008000000A, 0x8000000080008081,
+    0x8000000000008080, 0x0000000080000001, 0x8000000080008008]
+
+keccak_rotations = [
+    [0, 36, 3, 41, 18],
+    [1, 44, 10, 45, 2],
+    [62, 6, 43, 15, 61],
+    [28, 55, 25, 21, 56],
+    [27, 20, 39, 8, 14]]
+
+# Lane x + 5y moves to lane y + 5(2x + 3y), rotated, in the rho and pi steps.
+keccak_moves = [(x + 5 * y, y + 5 * ((2 * x + 3 * y) % 5),
+                 keccak_rotations[x][y])
+                for x in range(5) for y in range(5)]
+
+
+def keccak_f(a):
+    """Apply the Keccak-f[1600] permutation to a list of 25 lanes."""
+    b = [0] * 25
+    for rc in keccak_rounds:
+        c = [a[x] ^ a[x + 5] ^ a[x + 10] ^ a[x + 15] ^ a[x + 20]
+             for x in range(5)]
+        d = [c[x - 1] ^ (((c[(x + 1) % 5] << 1) | (c[(x + 1) % 5] >> 63))
+                         & mask64)
+             for x in range(5)]
+        for src, dst, r in keccak_moves:
+            v = a[src] ^ d[src % 5]
+            b[dst] = ((v << r) | (v >> (64 - r))) & mask64 if r else v
+        for y in range(0, 25, 5):
+            b0, b1, b2, b3, b4 = b[y:y + 5]
+            a[y] = b0 ^ (~b1 & b2)
+            a[y + 1] = b1 ^ (~b2 & b3)
+            a[y + 2] = b2 ^ (~b3 & b4)
+            a[y + 3] = b3 ^ (~b4 & b0)
+            a[y + 4] = b4 ^ (~b0 & b1)
+        a[0] ^= rc
+
+
+class Keccak256:
+    """A pure-Python keccak256 (the original padding, NOT SHA3)."""
+
+    name = "keccak_256"
+    digest_size = 32
+    block_size = 136
+
+    def __init__(self, bts=b''):
+        """Start a hash, optionally with some bytes."""
+        self.state = [0] * 25
+        self.buf = b''
+        self.update(bts)
+
+    def absorb(self, state, block):
+        """Xor a block into state and permute it."""
+        lanes = struct.unpack("<17Q", block)
+        for i, lane in enumerate(lanes):
+            state[i] ^= lane
+        keccak_f(state)
+
+    def update(self, bts):
+        """Add a bytes-like object to the hash."""
+        buf = self.buf + bytes(bts)
+        size = self.block_size
+        end = len(buf) - len(buf) % size
+        for i in range(0, end, size):
+            self.absorb(self.state, buf[i:i + size])
+        self.buf = buf[end:]
+
+    def digest(self):
+        """Return the hash of the bytes so far."""
+        state = list(self.state)
+        pad = bytearray(self.buf + b'\x01')
+        pad += bytes(self.block_size - len(pad))
+        pad[-1] |= 0x80
+        self.absorb(state, bytes(pad))
+        return struct.pack("<4Q", *state[:4])
+
+    def hexdigest(self):
+        """Return the hash of the bytes so far as a hex string."""
+        return self.digest().hex()
+
+    def copy(self):
+        """Return a copy of the hash in its current state."""
+        h = Keccak256()
+        h.state = list(self.state)
+        h.buf = self.buf
+        return h
+
+
+ripemd_words_l = [
+    0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15,
+    7, 4, 13, 1, 10, 6, 15, 3, 12, 0, 9, 5, 2, 14, 11, 8,
+    3, 10, 14, 4, 9, 15, 8, 1, 2, 7, 0, 6, 13, 11, 5, 12,
+    1, 9, 11, 10, 0, 8, 12, 4, 13, 3, 7, 15, 14, 5, 6, 2,
+    4, 0, 5, 9, 7, 12, 2, 10, 14, 1, 3, 8, 11, 6, 15, 13]
+ripemd_words_r = [
+    5, 14, 7, 0, 9, 2, 11, 4, 13, 6, 15, 8, 1, 10, 3, 12,
+    6, 11, 3, 7, 0, 13, 5, 10, 14, 15, 8, 12, 4, 9, 1, 2,
+    15, 5, 1, 3, 7, 14, 6, 9, 11, 8, 12, 2, 10, 0, 4, 13,
+    8, 6, 4, 1, 3, 11, 15, 0, 5, 12, 2, 13, 9, 7, 10, 14,
+    12, 15, 10, 4, 1, 5, 8, 7, 6, 2, 13, 14, 0, 3, 9, 11]
+ripemd_shifts_l = [
+    11, 14, 15, 12, 5, 8, 7, 9, 11, 13, 14, 15, 6, 7, 9, 8,
+    7, 6, 8, 13, 11, 9, 7, 15, 7, 12, 15, 9, 11, 7, 13, 12,
+    11, 13, 6, 7, 14, 9, 13, 15, 14, 8, 13, 6, 5, 12, 7, 5,
+    11, 12, 14, 15, 14, 15, 9, 8, 9, 14, 5, 6, 8, 6, 5, 12,
+    9, 15, 5, 11, 6, 8, 13, 12, 5, 12, 13, 14, 11, 8, 5, 6]
+ripemd_shifts_r = [
+    8, 9, 9, 11, 13, 15, 15, 5, 7, 7, 8, 11, 14, 14, 12, 6,
+    9, 13, 15, 7, 12, 8, 9, 11, 7, 7, 12, 7, 6, 15, 13, 11,
+    9, 7, 15, 11, 8, 6, 6, 14, 12, 13, 5, 14, 13, 13, 7, 5,
+    15, 5, 8, 11, 14, 14, 6, 14, 6, 9, 12, 9, 12, 5, 15, 8,
+    8, 5, 12, 9, 12, 5, 14, 6, 8, 13, 6, 5, 15, 13, 11, 11]
+ripemd_consts_l = [0x00000000, 0x5A827999, 0x6ED9EBA1, 0x8F1BBCDC,
+                   0xA953FD4E]
+ripemd_consts_r = [0x50A28BE6, 0x5C4DD124, 0x6D703EF3, 0x7A6D76E9,
+                   0x00000000]
+
+
+def ripemd_f(j, x, y, z):
+    """Return the boolean function of RIPEMD-160 round j."""
+    if j == 0:
+        return x ^ y ^ z
+    if j == 1:
+        return (x & y) | (~x & z)
+    if j == 2:
+        return (x | ~y) ^ z
+    if j == 3:
+        return (x & z) | (y & ~z)
+    return x ^ (y | ~z)
+
+
+# Each of the 80 steps on both lines, as (word, shift, round, constant).
+ripemd_steps_l = [(ripemd_words_l[i], ripemd_shifts_l[i], i // 16,
+                   ripemd_consts_l[i // 16]) for i in range(80)]
+ripemd_steps_r = [(ripemd_words_r[i], ripemd_shifts_r[i], 4 - i // 16,
+                   ripemd_consts_r[i // 16]) for i in range(80)]
+
+
+def ripemd_line(h, x, steps):
+    """Run one line of RIPEMD-160 over the words x, from the state h."""
+    a, b, c, d, e = h
+    for w, s, j, k in steps:
+        t = (a + (ripemd_f(j, b, c, d) & mask32) + x[w] + k) & mask32
+        t = (((t << s) | (t >> (32 - s))) & mask32) + e
+        c10 = ((c << 10) | (c >> 22)) & mask32
+        a, b, c, d, e = e, t & mask32, b, c10, d
+    return a, b, c, d, e
+
+
+class Ripemd160:
+    """A pure-Python ripemd160."""
+
+    name = "ripemd160"
+    digest_size = 20
+    block_size = 64
+
+    def __init__(self, bts=b''):
+        """Start a hash, optionally with some bytes."""
+        self.h = (0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476,
+                  0xC3D2E1F0)
+        self.buf = b''
+        self.length = 0
+        self.update(bts)
+
+    @staticmethod
+    def compress(h, block):
+        """Return the state h after compressing a 64 byte block."""
+        x = struct.unpack("<16I", block)
+        al, bl, cl, dl, el = ripemd_line(h, x, ripemd_steps_l)
+        ar, br, cr, dr, er = ripemd_line(h, x, ripemd_steps_r)
+        return ((h[1] + cl + dr) & mask32, (h[2] + dl + er) & mask32,
+                (h[3] + el + ar) & mask32, (h[4] + al + br) & mask32,
+                (h[0] + bl + cr) & mask32)
+
+    def update(self, bts):
+        """Add a bytes-like object to the hash."""
+        bts = bytes(bts)
+        self.length += len(bts)
+        buf = self.buf + bts
+        end = len(buf) - len(buf) % 64
+        h = self.h
+        for i in range(0, end, 64):
+            h = self.compress(h, buf[i:i + 64])
+        self.h = h
+        self.buf = buf[end:]
+
+    def digest(self):
+        """Return the hash of the bytes so far."""
+        pad = self.buf + b'\x80' + bytes((55 - len(self.buf)) % 64)
+        pad += struct.pack("<Q", (self.length * 8) & mask64)
+        h = self.h
+        for i in range(0, len(pad), 64):
+            h = self.compress(h, pad[i:i + 64])
+        return struct.pack("<5I", *h)
+
+    def hexdigest(self):
+        """Return the hash of the bytes so far as a hex string."""
+        return self.digest().hex()
+
+    def copy(self):
+        """Return a copy of the hash in its current state."""
+        h = Ripemd160()
+        h.h = self.h
+        h.buf = self.buf
+        h.length = self.length
+        return h
@@ -1,6 +1,15 @@
-from multiprocessing import Process, cpu_count
+from multiprocessing import Array, Event, Process, cpu_count
 from multiprocessing import Queue
-from pyperlib import data, ec
+from pyperlib import coinutil, data, ec, mods
+from queue import Empty
+import atexit
+import bisect
+import copy
+import heapq
+import itertools
+import json
+import math
+import os
 import re
 import string
 import time
@@ -14,60 +23,1186 @@ substitutions = {
 }
 
 
+modes = ["prefix", "suffix", "substring"]
+
+
 class InvalidCharException(Exception):
     """Raise when a non-alphanumeric character is used in a pattern."""
 
 
+class InvalidModeException(Exception):
+    """Raise when a vanity mode is not one of the supported modes."""
+
+
+class BudgetException(Exception):
+    """Raise when a search cannot be finished within its budget."""
+
+
+class ImpossiblePatternException(Exception):
+    """Raise when a pattern can never match an address of the coin."""
+
+
+class MultiCoinException(Exception):
+    """Raise when a set of coins cannot be searched in a single pass."""
+
+
+class CheckpointException(Exception):
+    """Raise when a state file does not belong to the requested search."""
+
+
+class Progress:
+    """A snapshot of how far a vanity search has come."""
+
+    def __init__(self, attempts, elapsed, expected):
+        """Create the snapshot from attempt counts and seconds elapsed."""
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.expected = expected
+
+    @property
+    def rate(self):
+        """Return the number of keys tried per second."""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.attempts / self.elapsed
+
+    @property
+    def chance(self):
+        """Return the probability that a match would have been found by now."""
+        if self.expected is None or math.isinf(self.expected):
+            return None
+        return 1 - math.exp(-self.attempts / self.expected)
+
+    @property
+    def eta(self):
+        """Return the expected number of seconds until a match is found."""
+        # Every key is equally likely to match, so keys already tried do
+        # not bring a match any closer.
+        if self.chance is None or self.rate == 0:
+            return None
+        return self.expected / self.rate
+
+    @staticmethod
+    def format_time(seconds):
+        """Return a short human-readable string for a number of seconds."""
+        if seconds is None:
+            return "unknown"
+        for unit, size in (("y", 31557600), ("d", 86400), ("h", 3600),
+                           ("m", 60)):
+            if seconds >= size:
+                return "{:.1f}{}".format(seconds / size, unit)
+        return "{:.0f}s".format(seconds)
+
+    def __str__(self):
+        """Return a one-line status of the search."""
+        msg = "{} keys, {:.0f} keys/s".format(self.attempts, self.rate)
+        if self.expected is None:
+            return msg
+        elif math.isinf(self.expected):
+            return msg + ", pattern can never match"
+        msg += ", {:.0%} chance, expected {:.0f} keys, ETA {}".format(
+            self.chance, self.expected, self.format_time(self.eta))
+        return msg
+
+
+class Match:
+    """A key found by a vanity search, and the pattern it matched."""
+
+    def __init__(self, keypair, pattern, compression=None, offset=None,
+                 Coin=None, score=None):
+        """Create the match from a KeyPair, pattern and compression."""
+        self.keypair = keypair
+        self.pattern = pattern
+        self.compression = compression
+        self.Coin = Coin
+        # The number of pattern characters matched, which is less than the
+        # pattern's length for the partial results of best-effort searches.
+        if score is None:
+            score = len(pattern)
+        self.score = score
+        # In a split-key search, offset is the KeyPair that the owner of the
+        # searched public key adds to their secret.
+        self.offset = offset
+
+    @property
+    def priv(self):
+        """Return the private key Data of the match."""
+        return self.keypair.priv
+
+
+class WorkerError(Exception):
+    """Raise when a vanity worker process fails."""
+
+
+class Task:
+    """A picklable description of one vanity search."""
+
+    def __init__(self, Coin, patterns, mode="prefix", case=False,
+                 compression=True, checkpoint=None, base=None, top=None,
+                 timeout=None, limit=None):
+        """Describe a search for patterns on a coin type or list of them."""
+        if not isinstance(Coin, (list, tuple)):
+            Coin = [Coin]
+        # Altcoin classes are built at runtime and cannot be pickled, so
+        # workers look them up by name when possible.
+        self.coins = []
+        for C in Coin:
+            name = coinutil.CoinFinder.normalize(C.name)
+            if coinutil.CoinFactory.get(name) is C:
+                self.coins.append(name)
+            else:
+                self.coins.append(C)
+        self.patterns = patterns
+        self.mode = mode
+        self.case = case
+        self.compression = compression
+        self.checkpoint = checkpoint
+        self.base = base
+        self.top = top
+        self.timeout = timeout
+        self.limit = limit
+
+    @property
+    def Coins(self):
+        """Return the list of coin types to search on."""
+        return [coinutil.CoinFactory.get(c) if type(c) is str else c
+                for c in self.coins]
+
+    @property
+    def Coin(self):
+        """Return the first coin type to search on."""
+        return self.Coins[0]
+
+    def matcher(self, patterns=None):
+        """Return the fastest Matcher for the coins and mode."""
+        if patterns is None:
+            patterns = self.patterns
+        if len(self.coins) > 1:
+            return MultiMatcher(self.Coins, patterns, self.mode, self.case)
+        return self.coin_matcher(self.Coin, patterns, self.mode, self.case)
+
+    def truncate(self, pattern, n):
+        """Return the part of pattern that its first n matching chars are."""
+        if self.mode == "suffix":
+            return pattern[-n:]
+        return pattern[:n]
+
+    def level(self, levels, n):
+        """Return the Matcher for the patterns cut to n characters."""
+        # Long case-insensitive patterns have many variants, so each level
+        # is only built once some key has reached it.
+        if n not in levels:
+            levels[n] = self.matcher([self.truncate(p, n)
+                                      for p in self.patterns if len(p) >= n])
+        return levels[n]
+
+    def rank(self, heap, levels, pub, k, compressed):
+        """Push the key onto heap if it matches more than the worst entry."""
+        # A key can only enter a full heap by beating its lowest score, so
+        # most keys cost one check of the next level.
+        longest = max(len(p) for p in self.patterns)
+        n = 1
+        if len(heap) >= self.top:
+            n = heap[0][0] + 1
+        if n > longest:
+            return
+        hits = self.level(levels, n).match_all(pub)
+        if not hits:
+            return
+        while n < longest:
+            more = self.level(levels, n + 1).match_all(pub)
+            if not more:
+                break
+            hits = more
+            n += 1
+
+        entry = (n, k, compressed, hits)
+        if len(heap) >= self.top:
+            heapq.heapreplace(heap, entry)
+        else:
+            heapq.heappush(heap, entry)
+
+    def exhausted(self, attempts, start):
+        """Return whether the attempt or time budget has run out."""
+        if self.limit is not None and attempts >= self.limit:
+            return True
+        return (self.timeout is not None and
+                time.time() - start >= self.timeout)
+
+    def share(self, parts):
+        """Return the task that each of parts workers runs."""
+        # The key budget covers the whole search, so each worker walks its
+        # own slice of it.
+        if self.limit is None:
+            return self
+        part = copy.copy(self)
+        part.limit = math.ceil(self.limit / parts)
+        return part
+
+    @staticmethod
+    def coin_matcher(Coin, patterns, mode, case):
+        """Return the fastest Matcher that supports the coin and mode."""
+        args = (Coin, patterns, mode, case)
+        if mode == "prefix" and RangeMatcher.supports(Coin):
+            return RangeMatcher(*args)
+        elif mode == "suffix" and SuffixMatcher.supports(Coin):
+            return SuffixMatcher(*args)
+        elif HexMatcher.supports(Coin):
+            return HexMatcher(*args)
+        else:
+            return RegexMatcher(*args)
+
+    def encodings(self):
+        """Return which public key encodings each key is checked with."""
+        if not self.Coin.compressible:
+            return [False]
+        elif self.compression is None:
+            return [True, False]
+        else:
+            return [self.compression]
+
+    def expected(self):
+        """Return the expected number of keys tried before a match."""
+        expected = self.matcher().expected()
+        if expected is None:
+            return None
+        return expected / len(self.encodings())
+
+    def params(self):
+        """Return a dict of the options that decide which keys match."""
+        return {
+            "coins": [coinutil.CoinFinder.normalize(C.name)
+                      for C in self.Coins],
+            "patterns": self.patterns,
+            "mode": self.mode,
+            "case": self.case,
+            "compression": self.compression,
+            "base": None if self.base is None else self.base.hex()
+        }
+
+    def search(self, stop, report, index=0):
+        """Walk keys until a match is found or stop is set."""
+        Coin = self.Coin
+        params = ec.curve_params[Coin.curve]
+        encodings = self.encodings()
+
+        # Walk k, k+1, k+2, ... from one key, so that each candidate costs a
+        # point addition instead of a full key generation.
+        if self.checkpoint is None:
+            kp = ec.KeyPair(Coin.curve)
+        else:
+            kp = self.checkpoint.keypair(Coin.curve, index)
+        k = kp.priv.int
+        point = kp.point()
+        if self.base is not None:
+            # Split-key search: k is an offset from the base public key.
+            point = params.add(params.decode(self.base), point)
+
+        # Best-effort searches keep the top entries instead of stopping at
+        # the first match, and return them once the budget is spent.
+        if self.top is None:
+            matcher = self.matcher()
+            levels = None
+        else:
+            levels = {}
+        heap = []
+        start = time.time()
+        attempts = 0
+        while not stop.is_set() and not self.exhausted(attempts, start):
+            size = WorkerPool.batch
+            if self.limit is not None:
+                size = min(size, self.limit - attempts)
+            for _ in range(size):
+                # Both encodings share the point, so the second only costs
+                # another address hash.
+                for compressed in encodings:
+                    pub = data.ByteData(params.encode(point, compressed))
+                    if levels is not None:
+                        self.rank(heap, levels, pub, k, compressed)
+                        continue
+                    hits = matcher.match_all(pub)
+                    if hits:
+                        report(attempts + 1, (k, compressed, hits))
+                        return
+                point = params.add(point, params.g)
+                k = (k + 1) % params.n
+                attempts += 1
+            report(attempts)
+
+        if levels is not None:
+            return heap
+
+
+def work(tasks, results, stop, counters):
+    """Run task parts from the pool's queue in a worker process until None."""
+    def report(attempts, match=None):
+        """Record the attempts made, and send any match to the parent."""
+        counters[slot] = attempts
+        if match is not None:
+            results.put(("match", slot, match))
+
+    # Any worker may take any part, so counters and key streams belong to
+    # the part's slot rather than to the process running it.
+    for slot, task in iter(tasks.get, None):
+        try:
+            best = task.search(stop, report, slot)
+            if best is not None:
+                results.put(("best", slot, best))
+        except Exception as e:
+            results.put(("error", slot, repr(e)))
+        results.put(("done", slot, None))
+
+
+class WorkerPool:
+    """A persistent set of processes that run vanity searches."""
+
+    batch = 1024
+    pools = {}
+
+    def __init__(self, jobs=None):
+        """Start jobs worker processes (all cores by default)."""
+        jobs = self.count(jobs)
+        self.jobs = jobs
+        self.tasks = Queue()
+        self.results = Queue()
+        self.stop = Event()
+        self.counters = Array('Q', jobs, lock=False)
+        self.processes = []
+
+        for _ in range(jobs):
+            args = (self.tasks, self.results, self.stop, self.counters)
+            proc = Process(target=work, args=args, daemon=True)
+            self.processes.append(proc)
+            proc.start()
+
+    @staticmethod
+    def count(jobs):
+        """Return the number of workers to use for a jobs argument."""
+        if jobs is None or jobs < 1:
+            return cpu_count()
+        return jobs
+
+    @classmethod
+    def shared(cls, jobs=None):
+        """Return a pool of jobs workers that is reused between searches."""
+        jobs = cls.count(jobs)
+        pool = cls.pools.get(jobs)
+        if pool is None or not pool.alive():
+            pool = cls(jobs)
+            cls.pools[jobs] = pool
+        return pool
+
+    @classmethod
+    def close_all(cls):
+        """Close every shared pool."""
+        for pool in cls.pools.values():
+            pool.close()
+        cls.pools = {}
+
+    def alive(self):
+        """Return whether every worker process is still running."""
+        return all(p.is_alive() for p in self.processes)
+
+    def attempts(self):
+        """Return the number of keys tried in the current search."""
+        return sum(self.counters)
+
+    def reset(self):
+        """Clear the attempt counters of the last search."""
+        for i in range(self.jobs):
+            self.counters[i] = 0
+
+    def run(self, task, callback=None, interval=1.0):
+        """Run task on every worker and return the list of results."""
+        self.stop.clear()
+        self.reset()
+        part = task.share(self.jobs)
+        for slot in range(self.jobs):
+            self.tasks.put((slot, part))
+
+        found = []
+        errors = []
+        done = 0
+        try:
+            while done < self.jobs:
+                try:
+                    kind, index, value = self.results.get(timeout=interval)
+                except Empty:
+                    # A killed worker never sends "done", so the search
+                    # would wait for it forever.
+                    if not self.alive():
+                        raise WorkerError("A vanity worker process died.")
+                    if callback is not None:
+                        callback()
+                    continue
+
+                if kind == "match":
+                    found.append(value)
+                elif kind == "best":
+                    found += value
+                elif kind == "error":
+                    errors.append(value)
+                else:
+                    done += 1
+                if kind in ("match", "error"):
+                    self.stop.set()
+        except BaseException:
+            self.close()
+            raise
+
+        if errors:
+            raise WorkerError(errors[0])
+        return found
+
+    def close(self):
+        """Stop the workers cooperatively and wait for them to exit."""
+        self.stop.set()
+        for _ in self.processes:
+            self.tasks.put(None)
+
+        # Workers cannot exit while their last results are stuck in a pipe.
+        for p in self.processes:
+            while p.is_alive():
+                try:
+                    while True:
+                        self.results.get_nowait()
+                except Empty:
+                    pass
+                p.join(0.1)
+
+
+atexit.register(WorkerPool.close_all)
+
+
 class Generator:
     """Generate vanity addresses."""
 
-    def __init__(self, Coin):
-        """Create the generator given a coin type."""
-        self.Coin = Coin
+    interval = 1.0
+
+    def __init__(self, Coin, jobs=None, mode="prefix", case=False,
+                 budget=None, compression=True, state=None, pool=None,
+                 split=None, timeout=None, max_keys=None, top=10):
+        """Create the generator given coin types and search options."""
+        if mode not in modes:
+            raise InvalidModeException(mode + " is not one of " +
+                                       ", ".join(modes) + ".")
+        if isinstance(Coin, (list, tuple)):
+            self.Coins = list(dict.fromkeys(Coin))
+        else:
+            self.Coins = [Coin]
+        if len(self.Coins) > 1:
+            MultiMatcher.check(self.Coins)
+        self.Coin = self.Coins[0]
+        if pool is None:
+            pool = WorkerPool.shared(jobs)
+        self.pool = pool
+        self.mode = mode
+        self.case = case
+        self.budget = budget
+        self.compression = compression
+        self.state = state
+        self.split = split
+        self.timeout = timeout
+        self.max_keys = max_keys
+        self.top = top
+        self.checkpoint = None
+        self.start = None
+        self.expected = None
 
     @staticmethod
-    def regex(pattern):
-        """Turn a pattern into a regular expression."""
+    def options(pattern, char, case=False):
+        """Return the list of characters that char in pattern may match."""
+        allowed_chars = []
+        if char not in string.digits + string.ascii_letters:
+            raise InvalidCharException(pattern + " is not alphanumeric.")
+        elif case or char in string.digits:
+            allowed_chars += [char]
+        else:
+            allowed_chars += [char.lower(), char.upper()]
+            if char.lower() in substitutions:
+                allowed_chars += substitutions[char.lower()]
+        return allowed_chars
+
+    @classmethod
+    def variants(cls, pattern, case=False):
+        """Yield every literal string that pattern may match."""
+        options = [cls.options(pattern, char, case) for char in pattern]
+        for chars in itertools.product(*options):
+            yield "".join(chars)
+
+    @classmethod
+    def regex(cls, pattern, mode="prefix", case=False):
+        """Turn a pattern into a regular expression to search with."""
         exp = ""
         for char in pattern:
-            allowed_chars = []
-            if char in string.digits:
-                allowed_chars += [char]
-            elif char in string.ascii_letters:
-                allowed_chars += [char.lower(), char.upper()]
-                if char.lower() in substitutions:
-                    allowed_chars += substitutions[char.lower()]
-            else:
-                raise InvalidCharException(pattern + " is not alphanumeric.")
+            allowed_chars = cls.options(pattern, char, case)
 
             exp += "("
             for c in allowed_chars:
                 exp += c + "|"
             exp = exp[:-1]
             exp += ")"
-        exp += ".*"
+
+        if mode == "prefix":
+            exp = "^" + exp
+        elif mode == "suffix":
+            exp += "$"
         return re.compile(exp)
 
-    def run_thread(self, pattern, queue):
-        """Run a single thread of vanity generation."""
-        regex = self.regex(pattern)
-        c = self.Coin()
-        match = False
-        while not match:
-            c = self.Coin()
-            addr = c.addr_string()
-            match = regex.match(addr)
-        queue.put(c.keypair)
-
-    def run(self, pattern):
-        """Generate and return a coin that matches the pattern."""
-        processes = []
-        queue = Queue(1)
-        for _ in range(cpu_count()):
-            proc = Process(target=self.run_thread, args=(pattern, queue))
-            processes += [proc]
-            proc.start()
-        kp = queue.get()
-        for p in processes:
-            p.terminate()
-        return kp
+    def task(self, patterns):
+        """Return the Task that searches for patterns."""
+        if type(patterns) is str:
+            patterns = [patterns]
+        base = None
+        if self.split is not None:
+            params = ec.curve_params[self.Coin.curve]
+            base = params.encode(self.split.point(), False)
+        top = None
+        if self.best_effort():
+            top = self.top
+        return Task(self.Coins, patterns, self.mode, self.case,
+                    self.compression, base=base, top=top,
+                    timeout=self.timeout, limit=self.max_keys)
+
+    def best_effort(self):
+        """Return whether the search stops at a time or key budget."""
+        return self.timeout is not None or self.max_keys is not None
+
+    def difficulty(self, patterns):
+        """Return the expected number of keys tried to match patterns."""
+        return self.task(patterns).expected()
+
+    def check(self, patterns):
+        """Raise an ImpossiblePatternException for unmatchable patterns."""
+        if self.mode != "prefix":
+            return
+        if HexMatcher.supports(self.Coin):
+            for pattern in patterns:
+                if not HexMatcher.fits_prefix(pattern, self.case):
+                    raise ImpossiblePatternException(
+                        pattern + " can never match. " + self.Coin.name +
+                        " addresses always start with 0x.")
+            return
+
+        leadings = [PrefixTable.get(C) for C in self.Coins]
+        if None in leadings:
+            return
+
+        for pattern in patterns:
+            if pattern == "":
+                continue
+            first = self.options(pattern, pattern[0], self.case)
+            if any(c in leading for c in first for leading in leadings):
+                continue
+
+            if len(self.Coins) == 1:
+                chars = ", ".join("{} ({:.1%})".format(c, p)
+                                  for c, p in sorted(leadings[0].items()))
+                raise ImpossiblePatternException(
+                    pattern + " can never match. " + self.Coin.name +
+                    " addresses can only start with: " + chars)
+            chars = ", ".join(sorted(set().union(*leadings)))
+            raise ImpossiblePatternException(
+                pattern + " can never match. Addresses of these coins can "
+                "only start with: " + chars)
+
+    def resume(self, task):
+        """Attach a Checkpoint from the state file to task."""
+        if not isinstance(self.pool, WorkerPool):
+            raise CheckpointException("State files can only be used by "
+                                      "searches on this machine.")
+        self.checkpoint = Checkpoint.open(self.state, task, self.pool.jobs)
+        task.checkpoint = self.checkpoint
+
+        # Every stream of the saved search needs a worker to continue it.
+        streams = len(self.checkpoint.offsets)
+        if streams != self.pool.jobs:
+            self.pool = WorkerPool.shared(streams)
+
+    def progress(self):
+        """Return the Progress of the running search."""
+        attempts = self.pool.attempts()
+        elapsed = time.time() - self.start
+        return Progress(attempts, elapsed, self.expected)
+
+    def run(self, patterns, progress=None):
+        """Return a list of Matches, calling progress every interval."""
+        task = self.task(patterns)
+        self.check(task.patterns)
+        # Best-effort searches end at their budget rather than at a match,
+        # and skip the full-length matcher, which is slow to build for long
+        # case-insensitive patterns.
+        self.expected = None
+        if not self.best_effort():
+            self.expected = task.expected()
+
+        if self.expected is not None and math.isinf(self.expected):
+            raise ImpossiblePatternException(", ".join(task.patterns) +
+                                             " can never match.")
+
+        expected = self.expected
+        if self.budget and expected is not None and expected > self.budget:
+            raise BudgetException("The search is expected to take {:.3g} "
+                                  "keys, more than the budget of {:.3g}."
+                                  .format(self.expected, self.budget))
+
+        if self.state:
+            self.resume(task)
+
+        def callback():
+            """Pass the current Progress on to progress."""
+            if self.checkpoint is not None:
+                self.checkpoint.update(self.pool.counters)
+            if progress is not None:
+                progress(self.progress())
+
+        # Report the difficulty before any keys are tried.
+        self.pool.reset()
+        self.start = time.time()
+        callback()
+        try:
+            results = self.pool.run(task, callback, self.interval)
+        finally:
+            if self.checkpoint is not None:
+                self.checkpoint.update(self.pool.counters, force=True)
+        if self.checkpoint is not None:
+            self.checkpoint.remove()
+
+        if self.best_effort():
+            return self.best(task, results)
+
+        matcher = task.matcher()
+        matches = []
+        for k, compressed, _ in results:
+            kp, offset, hits = self.verify(matcher, k, compressed)
+            if not self.Coin.compressible:
+                compressed = None
+            for i, found in hits:
+                matches += [Match(kp, pattern, compressed, offset,
+                                  self.Coins[i]) for pattern in found]
+        if results and not matches:
+            raise WorkerError("No key returned by the workers matches.")
+        return matches
+
+    def keypair(self, k):
+        """Return the KeyPair of a found key, and its split offset."""
+        size = self.Coin.curve.key_size // 8
+        kp = ec.KeyPair(self.Coin.curve, priv=data.IntData(k, size))
+        if self.split is None:
+            return kp, None
+        return self.split.combine(kp), kp
+
+    def verify(self, matcher, k, compressed):
+        """Return the KeyPair, offset and rechecked hits of a found key."""
+        # Workers may run on other, untrusted machines, so the hits they
+        # report are recomputed from the key instead of believed.
+        n = ec.curve_params[self.Coin.curve].n
+        if type(k) is not int or not 0 < k < n:
+            return None, None, []
+        kp, offset = self.keypair(k)
+        return kp, offset, matcher.match_all(kp.pub(bool(compressed)))
+
+    def best(self, task, entries):
+        """Return Matches for the top entries from every worker's heap."""
+        longest = max(len(p) for p in task.patterns)
+        levels = {}
+        matches = []
+        for n, k, compressed, _ in sorted(entries, reverse=True):
+            if len(matches) >= self.top:
+                break
+            if type(n) is not int or not 0 < n <= longest:
+                continue
+            kp, offset, hits = self.verify(task.level(levels, n), k,
+                                           compressed)
+            if not hits:
+                continue
+            if not self.Coin.compressible:
+                compressed = None
+
+            # Report the first full pattern that the matched part came from.
+            i, found = hits[0]
+            pattern = next(p for p in task.patterns
+                           if len(p) >= n and task.truncate(p, n) in found)
+            matches.append(Match(kp, pattern, compressed, offset,
+                                 self.Coins[i], score=n))
+        return matches
+
+
+class Checkpoint:
+    """A vanity search walking key ranges derived from a saved seed."""
+
+    interval = 60.0
+
+    def __init__(self, path, params, seed, offsets):
+        """Create the checkpoint of a search from its state."""
+        self.path = path
+        self.params = params
+        self.seed = seed
+        self.offsets = list(offsets)
+        self.base = list(offsets)
+        self.saved = None
+
+    @classmethod
+    def open(cls, path, task, streams):
+        """Load the state file at path, or start a new one for task."""
+        params = task.params()
+        if not os.path.exists(path):
+            checkpoint = cls(path, params, os.urandom(32), [0] * streams)
+            checkpoint.save()
+            return checkpoint
+
+        with open(path) as f:
+            state = json.load(f)
+        if state["params"] != params:
+            raise CheckpointException(path + " was saved by a search with "
+                                      "different coin, patterns or options.")
+        return cls(path, params, bytes.fromhex(state["seed"]),
+                   state["offsets"])
+
+    def keypair(self, curve, index):
+        """Return the KeyPair that stream index continues from."""
+        n = ec.curve_params[curve].n
+        stream = data.ByteData(self.seed + index.to_bytes(4, 'big'))
+        start = mods.Sha256(stream).int % (n - 1) + 1
+        k = (start + self.offsets[index] - 1) % (n - 1) + 1
+        return ec.KeyPair(curve, priv=data.IntData(k, curve.key_size // 8))
+
+    def update(self, counters, force=False):
+        """Advance the offsets by the counters, saving every interval."""
+        for i, attempts in enumerate(counters):
+            if i < len(self.offsets):
+                self.offsets[i] = self.base[i] + attempts
+        if force or self.saved is None or \
+                time.time() - self.saved >= self.interval:
+            self.save()
+
+    def save(self):
+        """Write the state file atomically, readable only by its owner."""
+        state = {
+            "params": self.params,
+            "seed": self.seed.hex(),
+            "offsets": self.offsets
+        }
+        tmp = self.path + ".tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+        self.saved = time.time()
+
+    def remove(self):
+        """Delete the state file of a finished search."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class RegexMatcher:
+    """Match candidate public keys by their full address string."""
+
+    def __init__(self, Coin, patterns, mode="prefix", case=False):
+        """Compile a list of patterns for the given coin type."""
+        self.Coin = Coin
+        self.patterns = list(dict.fromkeys(patterns))
+        self.mode = mode
+        self.case = case
+        self.regexes = [Generator.regex(p, mode, case)
+                        for p in self.patterns]
+
+    def probability(self):
+        """Estimate the chance of one key matching, from the alphabet."""
+        if not issubclass(self.Coin.addr_type, data.Base58Data):
+            return None
+
+        chars = self.Coin.addr_type.base58_chars
+        leading = PrefixTable.get(self.Coin)
+        total = 0.0
+        for pattern in self.patterns:
+            p = 1.0
+            for i, char in enumerate(pattern):
+                options = set(Generator.options(pattern, char, self.case))
+                if i == 0 and self.mode == "prefix" and leading is not None:
+                    # The version decides how likely each first char is.
+                    p *= sum(leading.get(c, 0) for c in options)
+                else:
+                    p *= len(options & set(chars)) / len(chars)
+            if self.mode == "substring":
+                p *= self.positions(pattern)
+            total += p
+        return min(total, 1.0)
+
+    def positions(self, pattern):
+        """Return roughly how many places a substring could start at."""
+        size = len(getattr(self.Coin, "addr_version", b"")) + \
+            getattr(self.Coin, "addr_len", 0)
+        length = math.ceil(size * 8 / math.log2(58))
+        return max(length - len(pattern) + 1, 1)
+
+    def expected(self):
+        """Return the expected number of keys tried before a match."""
+        p = self.probability()
+        if p is None:
+            return None
+        elif p == 0:
+            return math.inf
+        else:
+            return 1 / p
+
+    def match_addr(self, addr):
+        """Return the list of patterns that an address string matches."""
+        return [p for p, regex in zip(self.patterns, self.regexes)
+                if regex.search(addr)]
+
+    def match(self, pub):
+        """Return the patterns that the address of public key Data matches."""
+        addr = self.Coin.pub2addr(pub).export(self.Coin.addr_type)
+        return self.match_addr(addr)
+
+    def match_payload_data(self, payload):
+        """Return the patterns that a base58check payload Data matches."""
+        addr = self.Coin.base58check(payload).export(self.Coin.addr_type)
+        return self.match_addr(addr)
+
+    def match_all(self, pub):
+        """Return a list of (coin index, patterns) that public key matches."""
+        patterns = self.match(pub)
+        if patterns:
+            return [(0, patterns)]
+        return []
+
+
+class RangeMatcher(RegexMatcher):
+    """Match base58check addresses by comparing raw payloads to ranges."""
+
+    csum_len = 4
+
+    def __init__(self, Coin, patterns, mode="prefix", case=False):
+        """Precompute the payload ranges of every variant of patterns."""
+        super().__init__(Coin, patterns, mode, case)
+
+        ranges = self.ranges(Coin, self.variants())
+        self.chance = self.share(Coin, ranges)
+
+        # A payload is a candidate if any checksum could complete it into
+        # the range, so the edges are confirmed against the regex on a hit.
+        csum_bits = self.csum_len * 8
+        payload_len = self.size(Coin) - self.csum_len
+        self.lows = []
+        self.highs = []
+        for lo, hi in ranges:
+            lo = (lo >> csum_bits).to_bytes(payload_len, 'big')
+            hi = ((hi - 1) >> csum_bits).to_bytes(payload_len, 'big')
+            self.lows.append(lo)
+            self.highs.append(hi)
+
+    def variants(self):
+        """Yield every literal string that any of the patterns may match."""
+        for pattern in self.patterns:
+            yield from Generator.variants(pattern, self.case)
+
+    def probability(self):
+        """Return the exact chance of one key matching."""
+        return self.chance
+
+    @classmethod
+    def supports(cls, Coin):
+        """Return whether Coin has a base58check versioned address."""
+        return (issubclass(Coin.addr_type, data.Base58Data) and
+                hasattr(Coin, "pub2payload"))
+
+    @staticmethod
+    def size(Coin):
+        """Return the length in bytes of Coin's addresses."""
+        return len(Coin.addr_version) + Coin.addr_len
+
+    @classmethod
+    def bounds(cls, Coin):
+        """Return the [lo, hi) range of ints that Coin's version allows."""
+        version = Coin.addr_version
+        shift = (cls.size(Coin) - len(version)) * 8
+        return (version.int << shift, (version.int + 1) << shift)
+
+    @classmethod
+    def ranges(cls, Coin, prefixes):
+        """Return the merged ranges of Coin's addresses starting so."""
+        chars = Coin.addr_type.base58_chars
+        size = cls.size(Coin)
+        bounds = cls.bounds(Coin)
+
+        ranges = []
+        for prefix in prefixes:
+            for r in cls.prefix_ranges(prefix, chars, size):
+                r = cls.intersect(r, bounds)
+                if r is not None:
+                    ranges.append(r)
+        return cls.merge(ranges)
+
+    @classmethod
+    def share(cls, Coin, ranges):
+        """Return the chance that a random address of Coin is in ranges."""
+        # Payloads are uniform within the version's bounds, so the share of
+        # the bounds covered by ranges is the chance of a match.
+        lo, hi = cls.bounds(Coin)
+        covered = sum(r[1] - r[0] for r in ranges)
+        return covered / (hi - lo)
+
+    @classmethod
+    def prefix_ranges(cls, prefix, chars, size):
+        """Return the [lo, hi) ranges of ints whose encoding starts so."""
+        # Every leading zero byte is encoded as one leading zero character.
+        zeros = len(prefix) - len(prefix.lstrip(chars[0]))
+        rest = prefix[zeros:]
+        if zeros > size:
+            return []
+        if rest == "":
+            return [(0, 256 ** (size - zeros))]
+        if zeros == size or any(c not in chars for c in rest):
+            return []
+
+        low = 256 ** (size - zeros - 1)
+        high = 256 ** (size - zeros)
+
+        value = 0
+        for c in rest:
+            value = value * 58 + chars.find(c)
+
+        ranges = []
+        scale = 1
+        while value * scale < high:
+            r = cls.intersect((value * scale, (value + 1) * scale),
+                              (low, high))
+            if r is not None:
+                ranges.append(r)
+            scale *= 58
+        return ranges
+
+    @staticmethod
+    def intersect(r1, r2):
+        """Return the intersection of two [lo, hi) ranges, or None."""
+        lo = max(r1[0], r2[0])
+        hi = min(r1[1], r2[1])
+        if lo < hi:
+            return (lo, hi)
+        else:
+            return None
+
+    @staticmethod
+    def merge(ranges):
+        """Return a sorted list of ranges with overlaps merged."""
+        merged = []
+        for lo, hi in sorted(ranges):
+            if merged and lo <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(hi, merged[-1][1]))
+            else:
+                merged.append((lo, hi))
+        return merged
+
+    def match_payload(self, payload):
+        """Return whether payload bytes could fall into a matching range."""
+        i = bisect.bisect_right(self.lows, payload) - 1
+        return i >= 0 and payload <= self.highs[i]
+
+    def match(self, pub):
+        """Return the patterns that the address of public key Data matches."""
+        return self.match_payload_data(self.Coin.pub2payload(pub))
+
+    def match_payload_data(self, payload):
+        """Return the patterns that a base58check payload Data matches."""
+        if not self.match_payload(payload.bytes):
+            return []
+        return super().match_payload_data(payload)
+
+
+class SuffixMatcher(RangeMatcher):
+    """Match base58check addresses by the remainder of their value."""
+
+    def __init__(self, Coin, patterns, mode="suffix", case=False):
+        """Precompute the remainders of every variant of patterns."""
+        RegexMatcher.__init__(self, Coin, patterns, mode, case)
+        chars = Coin.addr_type.base58_chars
+
+        # The last n characters of an address are its value modulo 58**n.
+        self.remainders = {}
+        for variant in self.variants():
+            if any(c not in chars for c in variant):
+                continue
+            value = 0
+            for c in variant:
+                value = value * 58 + chars.find(c)
+            modulus = 58 ** len(variant)
+            self.remainders.setdefault(modulus, set()).add(value)
+
+        self.chance = 0.0
+        for modulus, values in self.remainders.items():
+            self.chance += len(values) / modulus
+        self.chance = min(self.chance, 1.0)
+
+    def match_payload_data(self, payload):
+        """Return the patterns that a base58check payload Data matches."""
+        addr = self.Coin.base58check(payload)
+        value = addr.int
+        for modulus, values in self.remainders.items():
+            if value % modulus in values:
+                return self.match_addr(addr.export(self.Coin.addr_type))
+        return []
+
+
+class HexMatcher(RegexMatcher):
+    """Match hex addresses on the raw payload, checksumming only hits."""
+
+    chars = "0123456789abcdef"
+    prefix = "0x"
+    size = 20
+
+    def __init__(self, Coin, patterns, mode="prefix", case=False):
+        """Compile lowercase versions of patterns to screen payloads with."""
+        super().__init__(Coin, patterns, mode, case)
+        # The lowercase hex has the same characters as the checksummed
+        # address, so only case-sensitive patterns need the checksum.
+        self.lowers = [Generator.regex(p.lower(), mode, case)
+                       for p in self.patterns]
+
+    @classmethod
+    def supports(cls, Coin):
+        """Return whether Coin has a hex address built from raw bytes."""
+        return (not issubclass(Coin.addr_type, data.Base58Data) and
+                hasattr(Coin, "pub2payload") and
+                hasattr(Coin, "payload2addr"))
+
+    @classmethod
+    def fits_prefix(cls, pattern, case=False):
+        """Return whether the start of pattern can match the 0x prefix."""
+        # Patterns shorter than the prefix, like "0", only need to agree
+        # with the part of it that they cover.
+        return all(cls.prefix[i] in Generator.options(pattern, c, case)
+                   for i, c in enumerate(pattern[:len(cls.prefix)]))
+
+    def char_chance(self, pattern, char):
+        """Return the chance that one address character matches char."""
+        if self.case:
+            if char in string.digits:
+                return 1 / 16
+            elif char.lower() in self.chars:
+                # The checksum makes each letter upper case half the time.
+                return 1 / 32
+            return 0.0
+        options = Generator.options(pattern, char, self.case)
+        return len({c.lower() for c in options} & set(self.chars)) / 16
+
+    def probability(self):
+        """Return the chance of one key matching."""
+        total = 0.0
+        for pattern in self.patterns:
+            body = pattern
+            if self.mode == "prefix":
+                if not self.fits_prefix(pattern, self.case):
+                    continue
+                body = pattern[len(self.prefix):]
+
+            p = 1.0
+            for char in body:
+                p *= self.char_chance(pattern, char)
+            if self.mode == "substring":
+                p *= max(self.size * 2 - len(body) + 1, 1)
+            total += p
+        return min(total, 1.0)
+
+    def match(self, pub):
+        """Return the patterns that the address of public key Data matches."""
+        payload = self.Coin.pub2payload(pub)
+        lower = "0x" + payload.bytes.hex()
+        if not any(regex.search(lower) for regex in self.lowers):
+            return []
+        elif not self.case:
+            return self.match_addr(lower)
+        addr = self.Coin.payload2addr(payload)
+        return self.match_addr(addr.export(self.Coin.addr_type))
+
+
+class MultiMatcher(RegexMatcher):
+    """Match several bitcoin-like coins with one hash160 per key."""
+
+    def __init__(self, Coins, patterns, mode="prefix", case=False):
+        """Make a Matcher for each coin type in Coins."""
+        self.Coins = Coins
+        self.Coin = Coins[0]
+        self.patterns = list(dict.fromkeys(patterns))
+        self.mode = mode
+        self.case = case
+        self.matchers = [Task.coin_matcher(C, patterns, mode, case)
+                         for C in Coins]
+        self.versions = [C.addr_version for C in Coins]
+
+    @classmethod
+    def check(cls, Coins):
+        """Raise a MultiCoinException unless Coins share their hash160."""
+        for Coin in Coins:
+            if not (RangeMatcher.supports(Coin) and
+                    hasattr(Coin, "pub2hash")):
+                raise MultiCoinException(
+                    Coin.name + " does not use a versioned hash160 "
+                    "address, so it cannot be searched with other coins.")
+            if Coin.curve is not Coins[0].curve:
+                raise MultiCoinException(
+                    Coin.name + " does not use the same curve as " +
+                    Coins[0].name + ".")
+
+    def probability(self):
+        """Return the chance of one key matching any of the coins."""
+        total = 0.0
+        for m in self.matchers:
+            p = m.probability()
+            if p is None:
+                return None
+            total += p
+        return min(total, 1.0)
+
+    def match(self, pub):
+        """Return the patterns that any coin's address of pub matches."""
+        return [p for _, patterns in self.match_all(pub) for p in patterns]
+
+    def match_all(self, pub):
+        """Return a list of (coin index, patterns) that public key matches."""
+        h = self.Coin.pub2hash(pub)
+        hits = []
+        for i, (version, m) in enumerate(zip(self.versions, self.matchers)):
+            patterns = m.match_payload_data(version + h)
+            if patterns:
+                hits.append((i, patterns))
+        return hits
+
+
+class PrefixTable:
+    """The possible leading address characters of every coin."""
+
+    table = None
+
+    @classmethod
+    def build(cls):
+        """Return a table of leading characters for every known coin."""
+        table = {}
+        for name, Coin in coinutil.CoinFactory.dict().items():
+            if RangeMatcher.supports(Coin):
+                table[name] = cls.leading(Coin)
+        return table
+
+    @staticmethod
+    def leading(Coin):
+        """Return a dict of each possible first character's probability."""
+        leading = {}
+        for c in Coin.addr_type.base58_chars:
+            ranges = RangeMatcher.ranges(Coin, [c])
+            if ranges:
+                leading[c] = RangeMatcher.share(Coin, ranges)
+        return leading
+
+    @classmethod
+    def get(cls, Coin):
+        """Return the leading characters of Coin, or None if unknown."""
+        if cls.table is None:
+            cls.table = cls.build()
+
+        name = coinutil.CoinFinder.normalize(Coin.name)
+        leading = cls.table.get(name)
+        if leading is None and RangeMatcher.supports(Coin):
+            leading = cls.leading(Coin)
+        return leading
@@ -99,10 +99,10 @@ class Wallet:
         if self.debug:
             prompt.pass_input = input
 
-        i = self.Importer(self.Coin, prompt)
+        i = self.Importer(self.Coin, prompt, **self.kwargs)
         coin = i.run()
 
-        coin.apply_settings(**self.kwargs)
+        coin.apply_settings(**i.coin_kwargs)
         coin.calc_all()
 
         if self.Cryptor is not None:
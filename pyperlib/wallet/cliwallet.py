@@ -1,4 +1,4 @@
-from pyperlib import wallet, prompter
+from pyperlib import wallet, prompter, mods
 import argparse
 import sys
 
@@ -64,6 +64,21 @@ class CliWallet(wallet.Wallet):
         self.parser.add_argument(*args, choices=choices, default=default,
                                  help=help, **kwargs)
 
+    def add_setting(self, setting):
+        """Create an optional argument in parser from a Setting."""
+        help = (setting.description + " (default=" +
+                str(setting.default) + ")")
+        arg = "--" + setting.name
+
+        if setting.s_type is bool:
+            s_type = self.str2bool
+        else:
+            s_type = setting.s_type
+
+        self.parser.add_argument(arg, default=None, type=s_type,
+                                 metavar=setting.name, dest=setting.name,
+                                 help=help)
+
     def make_parser(self, prog):
         """Create the parser and add all needed arguments."""
         formatter = argparse.RawTextHelpFormatter
@@ -91,23 +106,21 @@ class CliWallet(wallet.Wallet):
                       default_desc="no encryption", metavar="encryption",
                       dest="cryptor", help=encrypt_help, descriptions=True)
 
-        for setting in self.Settings.settings:
-            help = (setting.description + " (default=" +
-                    str(setting.default) + ")")
-            arg = "--" + setting.name
-
-            if setting.s_type is bool:
-                s_type = self.str2bool
-            else:
-                s_type = setting.s_type
+        settings = list(self.Settings.settings)
+        for Importer in imp_f.dict().values():
+            settings += [s for s in Importer.settings if s not in settings]
 
-            self.parser.add_argument(arg, default=None, type=s_type,
-                                     metavar=setting.name, dest=setting.name,
-                                     help=help)
+        for setting in settings:
+            self.add_setting(setting)
 
         self.parser.add_argument("--debug", dest="debug", help=debug_help,
                                  action="store_true")
 
+    def show_backends(self):
+        """Write the backend chosen for every algorithm to stderr."""
+        for line in mods.report():
+            sys.stderr.write("Backend for " + line + "\n")
+
     def proc_args(self):
         """Process the arguments and make a wallet from them."""
         debug = self.args.debug
@@ -143,6 +156,8 @@ class CliWallet(wallet.Wallet):
             self.debug = debug
             self.kwargs = setting_args
 
+            if debug:
+                self.show_backends()
             super().run()
         except Exception as e:
             self.prompt.show_error(e, debug)
@@ -0,0 +1,89 @@
+from unittest import TestCase, skipIf
+from pyperlib import base58, data
+import hashlib
+import os
+
+ripple_chars = "rpshnaf39wBUDNEGHJKLM4PQRST7VWXYZ2bcdeCg65jkm8oFqi1tuvAxyz"
+
+
+def reference(bts, alphabet):
+    """Encode bytes one digit at a time, as a reference for Codec."""
+    value = int.from_bytes(bts, 'big')
+    b58 = ""
+    while value > 0:
+        b58 = alphabet[value % 58] + b58
+        value //= 58
+    zeros = len(bts) - len(bts.lstrip(b'\x00'))
+    return alphabet[0] * zeros + b58
+
+
+class TestCodec(TestCase):
+    """A TestCase for table-driven base58 conversion."""
+
+    def do_test(self, alphabet, bts):
+        """Check that bts encodes like the reference and decodes back."""
+        codec = base58.Codec.get(alphabet)
+        b58 = codec.encode(bts)
+        self.assertEqual(b58, reference(bts, alphabet))
+        self.assertEqual(codec.decode(b58), bts)
+
+    def test_set(self):
+        """Check short, long and zero-padded data in two alphabets."""
+        for alphabet in [data.BaseData.base58_chars, ripple_chars]:
+            self.do_test(alphabet, b'')
+            self.do_test(alphabet, b'\x00\x00')
+            for size in [1, 21, 25, 37, 127, 128, 129, 300]:
+                self.do_test(alphabet, os.urandom(size))
+                self.do_test(alphabet, b'\x00' + os.urandom(size))
+
+    def test_shared(self):
+        """Check that each alphabet's tables are built once."""
+        codec = base58.Codec.get(ripple_chars)
+        self.assertIs(base58.Codec.get(ripple_chars), codec)
+        Ripple58Data = data.DataFactory.make_base58_data(ripple_chars)
+        self.assertEqual(Ripple58Data("rpshn").base58, "rpshn")
+
+    def test_invalid(self):
+        """Check that characters outside the alphabet are refused."""
+        codec = base58.Codec.get(data.BaseData.base58_chars)
+        for b58 in ["1O", "0", "abc l", "2é"]:
+            self.assertRaises(ValueError, codec.decode, b58)
+            self.assertRaises(data.EncodingException, data.Base58Data, b58)
+
+
+@skipIf(base58.load_numpy() is None, "NumPy is not installed")
+class TestArray(TestCase):
+    """A TestCase for batch base58check conversion with NumPy."""
+
+    codec = base58.Codec.get(data.BaseData.base58_chars)
+
+    @staticmethod
+    def check(payload):
+        """Append the double SHA-256 checksum to payload."""
+        digest = hashlib.sha256(hashlib.sha256(payload).digest()).digest()
+        return payload + digest[:4]
+
+    def test_all(self):
+        """Check that rows encode like Codec.encode and decode back."""
+        rows = [self.check(bytes([v]) + os.urandom(20))
+                for v in [0, 5, 111, 255] * 25]
+        rows.append(self.check(b'\x00' * 21))
+        rows.append(self.check(b'\x00' * 3 + os.urandom(18)))
+        array = base58.load_numpy().frombuffer(b''.join(rows), dtype="uint8")
+        array = array.reshape(len(rows), 25)
+
+        b58s = self.codec.encode_array(array)
+        self.assertEqual(b58s, [self.codec.encode(r) for r in rows])
+        decoded, valid = self.codec.decode_check_array(b58s)
+        self.assertTrue(valid.all())
+        self.assertTrue((decoded == array).all())
+
+    def test_invalid(self):
+        """Check that bad strings are marked invalid and zeroed."""
+        good = self.codec.encode(self.check(b'\x00' + os.urandom(20)))
+        typo = good[:-1] + ("2" if good[-1] != "2" else "3")
+        b58s = [good, typo, "1O", "", good + "1", "2é",
+                self.codec.encode(self.check(os.urandom(22)))]
+        decoded, valid = self.codec.decode_check_array(b58s)
+        self.assertEqual(valid.tolist(), [True] + [False] * 6)
+        self.assertFalse(decoded[1:].any())
@@ -1,5 +1,7 @@
-from pyperlib import helper
+from pyperlib import helper, mods
 from pyperlib.wallet import cliwallet
+from unittest.mock import patch
+import io
 
 
 class BaseCliTest(helper.CliTestCase):
@@ -80,3 +82,17 @@ Public hex key: 02FE22B51BA42A72C90C85F74CF9D4088496620991535D92CF6768DEC8BBD1\
         self.do_test(self.in2, self.out2, "--debug", "-i", "brain",
                      "--compression", "no")
         self.do_test(self.in3, self.out3, "-i", "prompt", "-c", "ethereum")
+
+
+class TestDebug(BaseCliTest):
+    """Test that debugging mode reports the hash backends."""
+
+    def test_all(self):
+        """Check that stderr names the backend of every algorithm."""
+        w = self.make_wallet(("--debug", "-i", "prompt"))
+        stdin = ["17nArmyTmUGw9uPk3HsCabRj5wN7LfWSmR"]
+        with patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            self.cli_test(w.run, stdout=TestOutputs.out1, stdin=stdin)
+        for algorithm, b in mods.selected.items():
+            self.assertIn("Backend for " + algorithm + ": " + b.name,
+                          stderr.getvalue())
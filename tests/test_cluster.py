@@ -0,0 +1,112 @@
+from unittest import TestCase
+from multiprocessing import Process
+from pyperlib import cluster, coinutil, vanity
+import os
+import tempfile
+
+
+def serve(address, authkey, jobs):
+    """Run a node until its coordinator closes."""
+    cluster.Node(address, authkey, jobs).serve()
+
+
+class TestParseAddress(TestCase):
+    """A TestCase for reading coordinator addresses."""
+
+    def test_all(self):
+        """Check TCP and Unix socket addresses."""
+        self.assertEqual(cluster.parse_address("localhost:8000"),
+                         ("localhost", 8000))
+        self.assertEqual(cluster.parse_address("/tmp/vanity.sock"),
+                         "/tmp/vanity.sock")
+        with self.assertRaises(cluster.ClusterException):
+            cluster.check_authkey(None)
+
+
+class TestRemotePool(TestCase):
+    """A TestCase for searching with local stand-in nodes."""
+
+    cf = coinutil.CoinFactory
+    authkey = b"test"
+
+    def setUp(self):
+        """Start a coordinator on a Unix socket with two nodes."""
+        self.dir = tempfile.TemporaryDirectory()
+        address = os.path.join(self.dir.name, "socket")
+        self.pool = cluster.RemotePool(address, self.authkey)
+        self.nodes = [Process(target=serve,
+                              args=(address, self.authkey, 1))
+                      for _ in range(2)]
+        for node in self.nodes:
+            node.start()
+        self.assertTrue(self.pool.wait_nodes(2, timeout=30))
+
+    def tearDown(self):
+        """Close the coordinator and wait for the nodes to exit."""
+        self.pool.close()
+        for node in self.nodes:
+            node.join(30)
+            self.assertEqual(node.exitcode, 0)
+        self.dir.cleanup()
+
+    def do_test(self, name, pattern):
+        """Check that the cluster finds a match for pattern."""
+        Coin = self.cf.get(name)
+        g = vanity.Generator(Coin, pool=self.pool)
+        for m in g.run(pattern):
+            coin = Coin(key=m.priv)
+            self.assertEqual(coin.addr_string()[:len(pattern)].lower(),
+                             pattern.lower())
+
+    def test_all(self):
+        """Run do_test for consecutive searches on the same nodes."""
+        self.do_test("bitcoin", "1a")
+        self.do_test("litecoin", "Lb")
+        self.assertEqual(self.pool.jobs, 2)
+        self.assertGreater(self.pool.attempts(), 0)
+
+        for name, jobs, attempts, rate in self.pool.stats():
+            self.assertEqual(jobs, 1)
+
+    def test_best_effort(self):
+        """Check that nodes return their best keys within a budget."""
+        Coin = self.cf.get("bitcoin")
+        g = vanity.Generator(Coin, pool=self.pool, max_keys=2000, top=3)
+        matches = g.run("1abcdefgh")
+        self.assertEqual(len(matches), 3)
+        self.assertEqual(self.pool.attempts(), 2000)
+
+    def test_node_task(self):
+        """Check that every node walks different keys."""
+        Coin = self.cf.get("bitcoin")
+        task = vanity.Task(Coin, ["1a"])
+        seed = os.urandom(32)
+        keys = set()
+        for index in range(2):
+            t = cluster.RemotePool.node_task(task, seed, index, 2)
+            for i in range(2):
+                keys.add(t.checkpoint.keypair(Coin.curve, i).priv.int)
+        self.assertEqual(len(keys), 4)
+
+
+class TestEmptyPool(TestCase):
+    """A TestCase for budgets handed out to nodes that join late."""
+
+    authkey = b"test"
+
+    def test_all(self):
+        """Check that a search started before any node joins still runs."""
+        dir = tempfile.TemporaryDirectory()
+        address = os.path.join(dir.name, "socket")
+        pool = cluster.RemotePool(address, self.authkey)
+        node = Process(target=serve, args=(address, self.authkey, 2))
+        node.start()
+        try:
+            Coin = coinutil.CoinFactory.get("bitcoin")
+            g = vanity.Generator(Coin, pool=pool, max_keys=1000, top=1)
+            self.assertEqual(len(g.run("1abcdefgh")), 1)
+            self.assertEqual(pool.attempts(), 1000)
+        finally:
+            pool.close()
+            node.join(30)
+            dir.cleanup()
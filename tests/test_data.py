@@ -1,5 +1,7 @@
-from unittest import TestCase
-from pyperlib import data, helper
+from unittest import TestCase, skipIf
+from pyperlib import base58, data, helper, mods
+import copy
+import pickle
 
 
 class TestDataFactory(helper.TestNameFactory):
@@ -173,3 +175,152 @@ class TestSlice(TestCase):
         self.slice("AABBCC", "AABBCC", slice(None, None, None))
         self.slice("AABBCC", "BBCC", slice(1, 3, None))
         self.slice("AABBCC", "CCBBAA", slice(None, None, -1))
+
+
+class TestImmutable(TestCase):
+    """A TestCase for slot-based, immutable Data."""
+
+    def do_test(self, d, picklable=True):
+        """Check that d cannot change and survives pickling and copying."""
+        self.assertFalse(hasattr(d, "__dict__"))
+        with self.assertRaises(AttributeError):
+            d.bytes = b'\x00'
+        with self.assertRaises(AttributeError):
+            d.extra = 1
+        with self.assertRaises(AttributeError):
+            del d.bytes
+
+        self.assertEqual(d.int, d.int)
+        self.assertEqual(d.hex, d.hex)
+        self.assertEqual(d.base58, d.base58)
+        others = [copy.deepcopy(d)]
+        if picklable:
+            others.append(pickle.loads(pickle.dumps(d)))
+        for other in others:
+            self.assertIs(type(other), type(d))
+            self.assertEqual(other, d)
+            self.assertEqual(other.base58, d.base58)
+
+    def test_set(self):
+        """Check various Data types."""
+        self.do_test(data.ByteData(b'\x00\x01'))
+        self.do_test(data.HexData("AABB"))
+        self.do_test(data.IntData(255, 4))
+        self.do_test(data.Base58Data("1Ab"))
+        self.do_test(data.StringData("abc"))
+        self.do_test(mods.Sha256(data.ByteData(b'abc')))
+        Ripple58Data = data.DataFactory.make_base58_data(
+            "rpshnaf39wBUDNEGHJKLM4PQRST7VWXYZ2bcdeCg65jkm8oFqi1tuvAxyz")
+        self.do_test(Ripple58Data("rpshn"), picklable=False)
+
+
+class TestView(TestCase):
+    """A TestCase for Data views over a shared buffer."""
+
+    def test_all(self):
+        """Check that slices share memory and behave like copies."""
+        d = data.HexData("00AABBCCDD")
+        view = d[1:4]
+        self.assertIsInstance(view, data.DataView)
+        self.assertIs(view.buffer.obj, d.bytes)
+        self.assertIs(view[1:][:1].buffer.obj, d.bytes)
+        self.assertEqual(view, data.HexData("AABBCC"))
+        self.assertEqual(hash(view), hash(data.HexData("AABBCC")))
+        self.assertEqual(len(view), 3)
+        self.assertEqual(view.int, 0xAABBCC)
+        self.assertEqual(view.bytes, b'\xaa\xbb\xcc')
+        self.assertEqual(view[0], data.IntData(0xAA, 1))
+        self.assertEqual(view + d[:1], data.HexData("AABBCC00"))
+        self.assertEqual(pickle.loads(pickle.dumps(view)), view)
+        self.assertNotIsInstance(d[::2], data.DataView)
+
+
+class TestBuilder(TestCase):
+    """A TestCase for joining many pieces of Data."""
+
+    def test_all(self):
+        """Check that a builder joins its pieces in order."""
+        d = data.HexData("AABBCC")
+        builder = data.DataBuilder(d[:1], data.HexData("00"))
+        builder.append(d[1:]).extend([d, d[2:]])
+        self.assertEqual(len(builder), 8)
+        self.assertEqual(builder.build(), data.HexData("AA00BBCCAABBCCCC"))
+        self.assertEqual(data.DataBuilder().build(), data.ByteData())
+
+
+class TestDataArray(TestCase):
+    """A TestCase for fixed-width batches of Data."""
+
+    def test_all(self):
+        """Check indexing, slicing, iteration and export."""
+        ints = [1, 0xFF, 0, 0x123456]
+        a = data.DataArray.from_ints(ints, 4)
+        self.assertEqual(len(a), 4)
+        self.assertEqual(a.int, ints)
+        self.assertEqual(a.hex, [data.IntData(i, 4).hex for i in ints])
+        self.assertEqual(a.base58, [data.IntData(i, 4).base58
+                                    for i in ints])
+        self.assertEqual([d.int for d in a], ints)
+        self.assertIsInstance(a[1], data.DataView)
+        self.assertIs(a[1].buffer.obj, a.buffer.obj)
+        self.assertEqual(a[-1], data.IntData(0x123456, 4))
+        self.assertRaises(IndexError, a.__getitem__, 4)
+        self.assertEqual(a[1:3].int, ints[1:3])
+        self.assertEqual(a[::-1].int, ints[::-1])
+        self.assertEqual(a[3:1].int, [])
+        self.assertEqual(data.DataArray.from_data(a), a)
+        self.assertEqual(pickle.loads(pickle.dumps(a)), a)
+        self.assertIn(data.IntData(0xFF, 4), a)
+        self.assertNotIn(data.IntData(2, 4), a)
+        self.assertNotIn(data.IntData(0x100, 4), a)
+        self.assertIn(data.IntData(0x123456, 4), a)
+
+    def test_sets(self):
+        """Check set operations, keeping the first order of pieces."""
+        a = data.DataArray.from_ints([3, 1, 3, 2], 2)
+        b = data.DataArray.from_ints([2, 4], 2)
+        self.assertEqual(a.unique().int, [3, 1, 2])
+        self.assertEqual(a.union(b).int, [3, 1, 2, 4])
+        self.assertEqual(a.intersection(b).int, [2])
+        self.assertEqual(a.difference(b).int, [3, 1])
+        self.assertEqual((a + b).int, [3, 1, 3, 2, 2, 4])
+
+    def test_width(self):
+        """Check that mismatched widths are refused."""
+        with self.assertRaises(data.WidthException):
+            data.DataArray(b'\x00' * 5, 2)
+        with self.assertRaises(data.WidthException):
+            data.DataArray(b'\x00' * 4)
+        with self.assertRaises(data.WidthException):
+            data.DataArray.from_ints([256], 1)
+        with self.assertRaises(data.WidthException):
+            data.DataArray.from_data([data.HexData("00"),
+                                      data.HexData("0000")])
+        with self.assertRaises(data.WidthException):
+            data.DataArray(b'', 1) + data.DataArray(b'', 2)
+        with self.assertRaises(data.WidthException):
+            data.DataArray(memoryview(b'\x00' * 8).cast("I"), 4)
+
+        # Buffers that can change are copied, keeping the pieces fixed.
+        buf = bytearray(b'\x00' * 6)
+        a = data.DataArray(buf, 3)
+        buf[0] = 7
+        self.assertEqual(a[0].int, 0)
+
+    @skipIf(base58.load_numpy() is None, "NumPy is not installed")
+    def test_array(self):
+        """Check that read-only NumPy arrays are shared in both directions."""
+        numpy = base58.load_numpy()
+        rows = numpy.arange(12, dtype="uint8").reshape(4, 3)
+        rows.setflags(write=False)
+        a = data.DataArray(rows)
+        self.assertEqual(a.width, 3)
+        self.assertEqual(a[1], data.HexData("030405"))
+        self.assertTrue((a.array() == rows).all())
+        self.assertIs(a.buffer.obj, rows)
+
+        self.assertEqual(data.DataArray(rows[:, :2]).hex[1], "0304")
+        with self.assertRaises(data.WidthException):
+            data.DataArray(rows, 2)
+        with self.assertRaises(data.WidthException):
+            data.DataArray(numpy.zeros((2, 4), dtype="int64"))
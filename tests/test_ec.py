@@ -64,3 +64,146 @@ class TestPubC(TestCase):
     def test_set(self):
         """Check the example data with load_c."""
         self.load_c(ec.SECP256K1, ex_pubc)
+
+
+class TestCurveParams(TestCase):
+    """A TestCase for raw point arithmetic."""
+
+    def do_add(self, curve, priv):
+        """Check that adding the generator to priv's point gives priv+1."""
+        params = ec.curve_params[curve]
+        kp1 = ec.KeyPair(curve, priv=data.IntData(priv, 32))
+        kp2 = ec.KeyPair(curve, priv=data.IntData(priv + 1, 32))
+        kp3 = ec.KeyPair(curve, priv=data.IntData(priv * 2 % params.n, 32))
+
+        self.assertEqual(params.add(kp1.point(), params.g), kp2.point())
+        self.assertEqual(params.add(kp1.point(), kp1.point()), kp3.point())
+
+    def do_encode(self, curve, pub_u, pub_c):
+        """Check that encoding a point matches its public keys."""
+        params = ec.curve_params[curve]
+        point = ec.KeyPair(curve, pub=pub_u).point()
+
+        self.assertEqual(params.encode(point, False), pub_u.bytes)
+        self.assertEqual(params.encode(point, True), pub_c.bytes)
+
+    def do_multiply(self, curve, priv):
+        """Check that multiplying the generator by priv gives its point."""
+        params = ec.curve_params[curve]
+        kp = ec.KeyPair(curve, priv=data.IntData(priv, 32))
+        self.assertEqual(params.multiply(priv), kp.point())
+
+    def do_decode(self, curve, pub_u, pub_c):
+        """Check that both encodings decode to the same point."""
+        params = ec.curve_params[curve]
+        point = params.decode(pub_u.bytes)
+        self.assertEqual(params.decode(pub_c.bytes), point)
+        self.assertRaises(ValueError, params.decode, pub_c.bytes[1:])
+
+    def test_set(self):
+        """Check the example data and some small keys."""
+        self.do_add(ec.SECP256K1, ex_priv.int)
+        self.do_add(ec.SECP256K1, 1)
+        self.do_encode(ec.SECP256K1, ex_pubu, ex_pubc)
+        self.do_multiply(ec.SECP256K1, ex_priv.int)
+        self.do_multiply(ec.SECP256K1, 3)
+        self.do_decode(ec.SECP256K1, ex_pubu, ex_pubc)
+
+
+class TestCombine(TestCase):
+    """A TestCase for adding keys together."""
+
+    def do_test(self, curve, priv1, priv2):
+        """Check that public and private sums agree."""
+        kp1 = ec.KeyPair(curve, priv=priv1)
+        kp2 = ec.KeyPair(curve, priv=priv2)
+        priv = kp1.combine(kp2)
+        pub = ec.KeyPair(curve, pub=kp1.pub_c).combine(kp2)
+
+        self.assertEqual(priv.pub_u, pub.pub_u)
+        self.assertEqual(priv.pub_c, pub.pub_c)
+        self.assertEqual(pub.priv, None)
+
+    def test_set(self):
+        """Check the example data and random keys."""
+        for x in range(10):
+            kp = ec.KeyPair(ec.SECP256K1)
+            self.do_test(ec.SECP256K1, ex_priv, kp.priv)
+
+
+class TestEngine(TestCase):
+    """A TestCase for the pure-Python engine."""
+
+    def do_test(self, curve, priv):
+        """Check that both engines give the same keys for priv."""
+        kp1 = ec.KeyPair(curve, priv=priv, engine="openssl")
+        kp2 = ec.KeyPair(curve, priv=priv, engine="python")
+
+        self.assertEqual(kp2.priv, kp1.priv)
+        self.assertEqual(kp2.pub_u, kp1.pub_u)
+        self.assertEqual(kp2.pub_c, kp1.pub_c)
+        self.assertEqual(kp2.combine(kp1).engine, "python")
+
+    def test_set(self):
+        """Check the example data, edge keys and random keys."""
+        n = ec.curve_params[ec.SECP256K1].n
+        self.do_test(ec.SECP256K1, ex_priv)
+        for k in [1, 2, 255, 256, n - 1]:
+            self.do_test(ec.SECP256K1, data.IntData(k, 32))
+        for x in range(20):
+            kp = ec.KeyPair(ec.SECP256K1, engine="python")
+            self.assertNotEqual(kp.priv.bytes[0], 0)
+            self.do_test(ec.SECP256K1, kp.priv)
+
+    def test_multiply(self):
+        """Check the tables against double-and-add."""
+        params = ec.curve_params[ec.SECP256K1]
+        engine = ec.python_engine(ec.SECP256K1)
+        for k in [1, 7, ex_priv.int, params.n - 1, params.n + 5]:
+            self.assertEqual(engine.to_affine(engine.multiply(k)),
+                             params.multiply(k))
+        self.assertEqual(engine.multiply(params.n), None)
+
+    def test_invalid(self):
+        """Check that bad keys and engines are refused."""
+        n = ec.curve_params[ec.SECP256K1].n
+        for k in [0, n]:
+            self.assertRaises(ValueError, ec.KeyPair, ec.SECP256K1,
+                              priv=data.IntData(k, 32), engine="python")
+        self.assertRaises(ValueError, ec.KeyPair, ec.SECP256K1,
+                          engine="gpu")
+
+
+class TestMany(TestCase):
+    """A TestCase for making keys in bulk."""
+
+    def do_test(self, curve, privs, pubs):
+        """Check every key of the arrays against a single KeyPair."""
+        self.assertEqual(len(privs), len(pubs))
+        for priv, pub in zip(privs, pubs):
+            kp = ec.KeyPair(curve, priv=priv)
+            self.assertEqual(priv, kp.priv)
+            self.assertEqual(pub, kp.pub_u)
+
+    def test_all(self):
+        """Check generated and loaded keys across batches."""
+        curve = ec.SECP256K1
+        n = ec.curve_params[curve].n
+        privs, pubs = ec.KeyPair.gen_many(curve, 50)
+        self.assertEqual((privs.width, pubs.width), (32, 65))
+        self.assertTrue(all(priv.bytes[0] for priv in privs))
+        self.do_test(curve, privs, pubs)
+
+        keys = [ex_priv] + [data.IntData(k, 32) for k in [1, 2, n - 1]]
+        batch = ec.KeyPair.batch
+        ec.KeyPair.batch = 3
+        try:
+            privs, pubs = ec.KeyPair.load_priv_many(curve, keys)
+        finally:
+            ec.KeyPair.batch = batch
+        self.assertEqual(pubs[0], ex_pubu)
+        self.do_test(curve, privs, pubs)
+
+        self.assertEqual(len(ec.KeyPair.gen_many(curve, 0)[1]), 0)
+        self.assertRaises(ValueError, ec.KeyPair.load_priv_many, curve,
+                          [ex_priv, data.IntData(n, 32)])
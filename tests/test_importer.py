@@ -13,6 +13,7 @@ class TestImporterFactory(helper.TestNameFactory):
         self.do_test("base", None)
         self.do_test("nonexistant", None)
         self.do_test("prompt", importer.PromptImporter)
+        self.do_test("combine", importer.CombineImporter)
 
 
 class TestBaseImporter(TestCase):
@@ -91,3 +92,74 @@ class TestBrainImporter(TestBaseImporter):
         addr = "1Ge1Cn5UzqNnx37bpnoqWEY4McPFGG8Z5f"
 
         self.do_test(i, wif, None, addr, brain=phrase)
+
+
+class TestVanityImporter(TestBaseImporter):
+    """The same as TestBaseImporter, but for VanityImporter."""
+
+    def test_all(self):
+        """Run do_test for a short pattern given on the command line."""
+        i = importer.VanityImporter(self.Coin, prompter.BasePrompter())
+        coin = i.run(pattern="1a")
+        self.assertIn(coin.addr_string()[:2], ["1a", "1A"])
+
+        coin = i.run(pattern="1ab, 1cd")
+        self.assertIn(coin.addr_string()[:3].lower(), ["1ab", "1cd"])
+
+        i = importer.VanityImporter(self.Coin, prompter.BasePrompter(),
+                                    compression=False)
+        coin = i.run(pattern="1a")
+        self.assertFalse(coin.get_settings().compression)
+        self.assertEqual(coin.addr_string()[:2].lower(), "1a")
+
+    def test_budget(self):
+        """Return the closest address when the key budget runs out."""
+        info = {}
+        prompt = prompter.BasePrompter()
+        prompt.show_info = info.__setitem__
+        i = importer.VanityImporter(self.Coin, prompt, max_keys=1000)
+        coin = i.run(pattern="1a" + "z" * 10)
+        self.assertEqual(coin.addr_string()[:2].lower(), "1a")
+        self.assertIn("Closest match", info)
+
+        i = importer.VanityImporter(self.Coin, None, max_keys=1000)
+        coin = i.run(pattern="1a" + "z" * 10)
+        self.assertEqual(coin.addr_string()[:2].lower(), "1a")
+
+    def test_also(self):
+        """Search bitcoin and litecoin keys, returning the matching coin."""
+        i = importer.VanityImporter(self.Coin, prompter.BasePrompter(),
+                                    also="litecoin")
+        coin = i.run(pattern="L")
+        self.assertEqual(coin.name, "Litecoin")
+        self.assertEqual(coin.addr_string()[0], "L")
+
+    def test_split(self):
+        """Search for a split offset and combine it with the secret."""
+        secret = self.Coin()
+        pub = secret.keypair.pub_c.hex
+        info = {}
+
+        prompt = prompter.BasePrompter()
+        prompt.show_info = info.__setitem__
+        i = importer.VanityImporter(self.Coin, prompt, split=pub)
+        coin = i.run(pattern="1a")
+        self.assertEqual(coin.addr_string()[:2].lower(), "1a")
+
+        i = importer.CombineImporter(self.Coin)
+        combined = i.run(key=secret.wif_string(),
+                         offset=info["Split offset"])
+        self.assertEqual(combined.addr_string(), coin.addr_string())
+
+        # An uncompressed match combines into the uncompressed address.
+        i = importer.VanityImporter(self.Coin, prompt, split=pub,
+                                    compression=False)
+        coin = i.run(pattern="1a")
+        i = importer.CombineImporter(self.Coin)
+        combined = i.run(key=secret.wif_string(),
+                         offset=info["Split offset"])
+        self.assertFalse(combined.get_settings().compression)
+        self.assertEqual(combined.addr_string(), coin.addr_string())
+
+        i = importer.VanityImporter(self.Coin, None, split=pub)
+        self.assertRaises(ValueError, i.run, pattern="1a")
@@ -1,5 +1,6 @@
 from unittest import TestCase
 from pyperlib import mods, data
+import hashlib
 
 
 class ModTest(TestCase):
@@ -43,6 +44,36 @@ class TestRipeMD160(ModTest):
                      "D1A3258B5F6EB32A452BC6F3253ABC65C0275CF6", "ACD300")
 
 
+class TestHash160(ModTest):
+    """A TestCase for the Hash160 Mod and hash160 function."""
+
+    def test(self):
+        """Use do_test to check hash160."""
+        vectors = [("D5FCE02241DEB9FFF5F7085E5B92F7FB770F2F55", "ABCDEF"),
+                   ("B986393ACA223E7CFA354FADAD333A9F5233EBAF", "00AB"),
+                   ("CD2B61825D06B74EAE69365C46444BC13CB70BDA", "ACD300")]
+        for o, i in vectors:
+            self.do_test(mods.Hash160, o, i)
+            self.assertEqual(mods.hash160(bytes.fromhex(i)).hex().upper(), o)
+
+
+class TestDoubleSha256(ModTest):
+    """A TestCase for the DoubleSha256 Mod and double_sha256 function."""
+
+    def test(self):
+        """Use do_test to check double sha256."""
+        self.do_test(
+            mods.DoubleSha256,
+            "4533A01D26697DF306B3380E08F4FAE30F488D2985E6449E9BD9BD86849DDBC6",
+            "ABCDEF")
+        self.do_test(
+            mods.DoubleSha256,
+            "0B0CBF0AFC74145B9EEA5F0482447BF0F7F295CC52FD5E251E78BE3747D7635E",
+            "00AB")
+        self.assertEqual(mods.double_sha256(b'').hex(), hashlib.sha256(
+            hashlib.sha256(b'').digest()).hexdigest())
+
+
 class TestConcat(ModTest):
     """A TestCase for the Concat Mod."""
 
@@ -155,3 +186,160 @@ class TestKeccak(ModTest):
                      "60B479F80E48C302F0ADD", "A4B387A200")
         self.do_test(mods.Keccak, "FDA66FC2D882FF395D5DC2955E833B8F1E5FCC96907"
                      "E0B50B11C1EB4349F522F", "A57E98D0")
+
+
+class TestMany(TestCase):
+    """A TestCase for hashing many inputs at once."""
+
+    def do_test(self, many, Mod, *Mods):
+        """Check that many agrees with chaining Mod and Mods per item."""
+        items = [data.HexData(h) for h in ["", "00", "ABCDEF", "AB" * 100]]
+        expected = []
+        for d in items:
+            for M in (Mod,) + Mods:
+                d = M(d)
+            expected.append(d)
+
+        for threads in [None, 2]:
+            result = many(items, threads)
+            self.assertEqual(list(result), expected)
+            self.assertEqual(many([d.bytes for d in items], threads), result)
+
+        # Inputs past hashlib's GIL threshold are hashed on threads.
+        large = [bytes([i]) * mods.gil_minsize for i in range(4)]
+        self.assertEqual(many(large, 2), many(large))
+
+        array = data.DataArray.from_data([data.HexData("00AB"),
+                                          data.HexData("ACD3")])
+        self.assertEqual(list(many(array)),
+                         [many([d])[0] for d in array])
+        self.assertEqual(len(many([])), 0)
+        self.assertEqual(many([]).width, len(expected[0]))
+
+    def test_all(self):
+        """Run do_test for every batch function."""
+        self.do_test(mods.sha256_many, mods.Sha256)
+        self.do_test(mods.double_sha256_many, mods.Sha256, mods.Sha256)
+        self.do_test(mods.hash160_many, mods.Hash160)
+        self.do_test(mods.keccak_many, mods.Keccak)
+
+
+class TestBackends(TestCase):
+    """A TestCase for choosing between hash and cipher backends."""
+
+    def tearDown(self):
+        """Go back to the fastest backends."""
+        for algorithm in mods.backends:
+            mods.select(algorithm)
+
+    def test_all(self):
+        """Check that every working backend gives the same results."""
+        for algorithm, backends in mods.backends.items():
+            for b in backends:
+                if not b.probe():
+                    continue
+                mods.select(algorithm, b.name)
+                self.assertIs(mods.selected[algorithm], b)
+                self.assertIs(mods.backend(algorithm), b.impl)
+
+                if algorithm in mods.hash_algorithms:
+                    self.assertIs(getattr(mods, algorithm), b.impl)
+                    TestSha256().test()
+                    TestRipeMD160().test()
+                    TestHash160().test()
+                    TestKeccak().test()
+                elif algorithm == "scrypt":
+                    TestScrypt().test()
+                else:
+                    TestAes256().test()
+
+    def test_hashlib(self):
+        """Check that hashlib is used for every hash it supports."""
+        for algorithm in ["sha256", "ripemd160"]:
+            try:
+                hashlib.new(algorithm)
+            except ValueError:
+                continue
+            b = mods.backends[algorithm][0]
+            self.assertEqual(b.name, "hashlib")
+            self.assertTrue(b.probe(), b.error)
+
+    def test_pure(self):
+        """Check that pure-Python hashes can always be chosen."""
+        self.assertIs(mods.select("keccak256", "pure"),
+                      mods.purehash.Keccak256)
+        self.assertIs(mods.select("ripemd160", "pure"),
+                      mods.purehash.Ripemd160)
+        TestKeccak().test()
+        TestHash160().test()
+
+    def test_errors(self):
+        """Check that unknown algorithms and backends are refused."""
+        with self.assertRaises(mods.BackendError):
+            mods.select("md5")
+        with self.assertRaises(mods.BackendError):
+            mods.select("sha256", "nonexistant")
+
+    def test_report(self):
+        """Check that the report names every algorithm's backend."""
+        lines = mods.report()
+        self.assertEqual(len(lines), len(mods.backends))
+        for line, algorithm in zip(lines, mods.backends):
+            name = mods.selected[algorithm].name
+            self.assertTrue(line.startswith(algorithm + ": " + name + " ("))
+
+
+class TestRecipe(TestCase):
+    """A TestCase for compiling derivations from steps."""
+
+    class Coin:
+        """A stand-in coin with a version for recipes."""
+
+        name = "Test"
+        version = data.HexData("AB")
+
+    def test_all(self):
+        """Check that shared steps run once and constants are folded."""
+        calls = []
+
+        def count(bts):
+            """Record a call and return bts unchanged."""
+            calls.append(bytes(bts))
+            return bts
+
+        # Both outputs use an equal counted step, built separately.
+        version = mods.attr("version") + mods.const(b'\x01')
+        first = mods.source("a").apply(count)
+        second = mods.source("a").apply(count)
+        recipe = mods.Recipe(x=version + first[:2],
+                             y=(second + mods.source("b")).checksum())
+
+        fused = recipe.compile(self.Coin, "x", "y")
+        self.assertIs(recipe.compile(self.Coin, "x", "y"), fused)
+        x, y = fused(a=b'\x10\x20\x30', b=b'\x40')
+        self.assertEqual(x, b'\xab\x01\x10\x20')
+        payload = b'\x10\x20\x30\x40'
+        self.assertEqual(y, payload + mods.double_sha256(payload)[:4])
+        self.assertEqual(calls, [b'\x10\x20\x30'])
+
+    def test_hashes(self):
+        """Check that hashed steps match the hashing Mods."""
+        d = data.HexData("ABCDEF")
+        recipe = mods.Recipe(
+            h160=mods.source("d").hashed("sha256", "ripemd160"),
+            k=mods.source("d").hashed("keccak256")[-20:])
+        h160, k = recipe.compile(self.Coin, "h160", "k")(d=d.bytes)
+        self.assertEqual(h160, mods.Hash160(d).bytes)
+        self.assertEqual(k, mods.Keccak(d)[-20:].bytes)
+
+    def test_errors(self):
+        """Check that bad recipes are refused when compiled."""
+        recipe = mods.Recipe(x=mods.attr("missing"), y=mods.source("1a"))
+        with self.assertRaises(mods.RecipeError):
+            recipe.compile(self.Coin, "x")
+        with self.assertRaises(mods.RecipeError):
+            recipe.compile(self.Coin, "y")
+        with self.assertRaises(mods.RecipeError):
+            recipe.compile(self.Coin, "z")
+        with self.assertRaises(mods.RecipeError):
+            mods.source("a")[0]
@@ -25,6 +25,8 @@ class TestBasePrompter(TestCase):
                      name="", options=[])
         self.do_test(self.prompt.prompt_pass, error=NotImplementedError,
                      name="", type_f=str, repeat=True)
+        self.do_test(self.prompt.show_info, error=NotImplementedError,
+                     name="", info="")
 
 
 class TestCliPrompter(TestBasePrompter, helper.CliTestCase):
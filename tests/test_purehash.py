@@ -0,0 +1,49 @@
+from unittest import TestCase
+from pyperlib import purehash
+import hashlib
+import os
+
+
+class TestKeccak256(TestCase):
+    """A TestCase for the pure-Python keccak256."""
+
+    def test_all(self):
+        """Check known digests and hashing in several updates."""
+        h = purehash.Keccak256()
+        self.assertEqual(h.hexdigest(), "c5d2460186f7233c927e7db2dcc703c0"
+                                        "e500b653ca82273b7bfad8045d85a470")
+        h = purehash.Keccak256(b"abc")
+        self.assertEqual(h.hexdigest(), "4e03657aea45a94fc7d47ba826c8d667"
+                                        "c0d1e6e33a64a036ec44f58fa12d6c45")
+
+        bts = os.urandom(300)
+        for split in [0, 135, 136, 137, 300]:
+            h = purehash.Keccak256(bts[:split])
+            h2 = h.copy()
+            h2.update(bts[split:])
+            self.assertEqual(h2.digest(), purehash.Keccak256(bts).digest())
+        self.assertEqual(h.digest(), purehash.Keccak256(bts).digest())
+
+
+class TestRipemd160(TestCase):
+    """A TestCase for the pure-Python ripemd160."""
+
+    def test_all(self):
+        """Check known digests and agreement with hashlib."""
+        h = purehash.Ripemd160(b"abc")
+        self.assertEqual(h.hexdigest(),
+                         "8eb208f7e05d987a9b044a8e98c6b087f15a0bfc")
+        h = purehash.Ripemd160(b"a" * 1000)
+        self.assertEqual(h.hexdigest(),
+                         "aa69deee9a8922e92f8105e007f76110f381e9cf")
+
+        try:
+            hashlib.new('ripemd160')
+        except ValueError:
+            return
+        for size in [0, 55, 56, 63, 64, 65, 200]:
+            bts = os.urandom(size)
+            h = purehash.Ripemd160(bts[:size // 2]).copy()
+            h.update(bts[size // 2:])
+            self.assertEqual(h.digest(),
+                             hashlib.new('ripemd160', bts).digest())
@@ -0,0 +1,455 @@
+from unittest import TestCase
+from pyperlib import vanity, coinutil, ec
+import os
+import stat
+import tempfile
+
+
+class ForgedPool:
+    """A pool whose workers claim that key 1 matches every pattern."""
+
+    jobs = 1
+    counters = [0]
+
+    def reset(self):
+        """Do nothing, as no keys are tried."""
+
+    def attempts(self):
+        """Return that no keys were tried."""
+        return 0
+
+    def run(self, task, callback=None, interval=1.0):
+        """Return a forged result in the form the task expects."""
+        hits = [(0, task.patterns)]
+        if task.top is None:
+            return [(1, True, hits)]
+        return [(len(task.patterns[0]), 1, True, hits)]
+
+
+class TestGenerator(TestCase):
+    """A TestCase for generating vanity addresses."""
+
+    cf = coinutil.CoinFactory
+
+    def do_test(self, name, patterns, case=False):
+        """Generate coins for patterns and check their addresses."""
+        Coin = self.cf.get(name)
+        g = vanity.Generator(Coin, case=case)
+        matches = g.run(patterns)
+        self.assertGreater(len(matches), 0)
+
+        for m in matches:
+            self.assertIn(m.pattern, patterns)
+            coin = Coin(key=m.priv)
+            regex = g.regex(m.pattern, case=case)
+            self.assertTrue(regex.match(coin.addr_string()))
+
+    def test_all(self):
+        """Run do_test for short patterns on various coins."""
+        self.do_test("bitcoin", ["1a"])
+        self.do_test("litecoin", ["L"])
+        self.do_test("ethereum", ["0xa"])
+        self.do_test("ethereum", ["0xAb"], case=True)
+
+    def test_multiple(self):
+        """Run do_test for a list of patterns at once."""
+        self.do_test("bitcoin", ["1abc", "1xy", "1pq"])
+        self.do_test("ethereum", ["0xab", "0xcd"])
+
+    def test_modes(self):
+        """Run searches in every mode and check the addresses."""
+        Coin = self.cf.get("bitcoin")
+        for mode, pattern, check in [
+                ("suffix", "ab", lambda a: a[-2:].lower() == "ab"),
+                ("substring", "xyz", lambda a: "xyz" in a.lower()),
+                ("prefix", "1Ab", lambda a: a.startswith("1Ab"))]:
+            g = vanity.Generator(Coin, mode=mode, case=mode == "prefix")
+            for m in g.run(pattern):
+                self.assertTrue(check(Coin(key=m.priv).addr_string()))
+
+    def test_compression(self):
+        """Check that the matching compression is returned."""
+        Coin = self.cf.get("bitcoin")
+        for compression in [True, False, None]:
+            g = vanity.Generator(Coin, compression=compression)
+            for m in g.run("1ab"):
+                if compression is not None:
+                    self.assertEqual(m.compression, compression)
+                coin = Coin(key=m.priv)
+                coin.apply_settings(compression=m.compression)
+                self.assertEqual(coin.addr_string()[:3].lower(), "1ab")
+
+        g = vanity.Generator(Coin, compression=None)
+        self.assertAlmostEqual(g.difficulty("1ab") * 2,
+                               vanity.Generator(Coin).difficulty("1ab"))
+
+        g = vanity.Generator(self.cf.get("ethereum"), compression=None)
+        self.assertEqual(g.run("0xa")[0].compression, None)
+
+    def test_coins(self):
+        """Search several coins at once and check the reported coin."""
+        names = ["bitcoin", "litecoin", "dogecoin"]
+        Coins = [self.cf.get(name) for name in names]
+        g = vanity.Generator(Coins)
+        for m in g.run(["1ab", "Lab", "Dab"]):
+            self.assertIn(m.Coin, Coins)
+            addr = m.Coin(key=m.priv).addr_string()
+            self.assertEqual(addr[:3].lower(), m.pattern.lower())
+
+        single = vanity.Generator(Coins[0])
+        self.assertAlmostEqual(1 / g.difficulty("Lab"),
+                               1 / g.difficulty(["Lab", "1ab"]) -
+                               1 / single.difficulty("1ab"))
+
+        with self.assertRaises(vanity.ImpossiblePatternException):
+            g.run("3")
+        with self.assertRaises(vanity.MultiCoinException):
+            vanity.Generator([Coins[0], self.cf.get("ethereum")])
+
+    def test_best_effort(self):
+        """Check that budgeted searches return the closest keys in order."""
+        Coin = self.cf.get("bitcoin")
+        for mode, part in [("prefix", lambda a, n: a[:n]),
+                           ("suffix", lambda a, n: a[-n:])]:
+            g = vanity.Generator(Coin, jobs=2, mode=mode, max_keys=3000,
+                                 top=4)
+            matches = g.run(["1abcdefgh", "1zzzzzzzz"])
+            self.assertEqual(g.pool.attempts(), 3000)
+            self.assertEqual(len(matches), 4)
+
+            scores = [m.score for m in matches]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+            for m in matches:
+                addr = Coin(key=m.priv).addr_string()
+                regex = g.regex(part(m.pattern, m.score), mode)
+                self.assertTrue(regex.search(addr))
+
+        g = vanity.Generator(Coin, timeout=0.5, top=1)
+        self.assertEqual(len(g.run("1" + "z" * 20)), 1)
+        g = vanity.Generator(Coin, max_keys=100, top=1)
+        self.assertEqual(g.run("1abc")[0].pattern, "1abc")
+
+    def test_split(self):
+        """Check that offsets from a public key combine into matches."""
+        Coin = self.cf.get("bitcoin")
+        secret = ec.KeyPair(Coin.curve)
+        public = ec.KeyPair(Coin.curve, pub=secret.pub_c)
+
+        for m in vanity.Generator(Coin, split=public).run(["1a", "1b"]):
+            self.assertEqual(m.priv, None)
+            kp = secret.combine(m.offset)
+            self.assertEqual(kp.pub_c, m.keypair.pub_c)
+
+            coin = Coin(key=kp.priv)
+            self.assertIn(coin.addr_string()[:2].lower(), ["1a", "1b"])
+
+    def test_budget(self):
+        """Check that searches over budget are refused before running."""
+        g = vanity.Generator(self.cf.get("bitcoin"), budget=1e6)
+        self.assertRaises(vanity.BudgetException, g.run, "1abcdef")
+        self.assertRaises(vanity.ImpossiblePatternException, g.run, "3")
+        self.assertLess(g.difficulty("1a"), 1e6)
+
+        self.assertRaises(vanity.InvalidModeException, vanity.Generator,
+                          self.cf.get("bitcoin"), mode="middle")
+
+    def test_forged(self):
+        """Check that keys which do not match are not believed."""
+        # Key 1 has the address 1BgGZ9tcN4rm9KBzDn7KprQz87SZ26SAMH.
+        Coin = self.cf.get("bitcoin")
+        g = vanity.Generator(Coin, pool=ForgedPool())
+        self.assertRaises(vanity.WorkerError, g.run, "1abc")
+        g = vanity.Generator(Coin, pool=ForgedPool(), max_keys=10, top=1)
+        self.assertEqual(g.run("1abc"), [])
+        self.assertEqual(len(g.run("1bg")), 1)
+
+    def test_progress(self):
+        """Check that progress is reported while searching."""
+        reports = []
+        g = vanity.Generator(self.cf.get("bitcoin"))
+        g.interval = 0.01
+        g.run("1abc", progress=reports.append)
+
+        for p in reports:
+            self.assertIsInstance(p, vanity.Progress)
+            self.assertGreater(p.expected, 1000)
+
+
+class TestProgress(TestCase):
+    """A TestCase for the statistics of a Progress."""
+
+    def test_set(self):
+        """Check the rate, chance and eta of some example progress."""
+        p = vanity.Progress(1000, 2.0, 4000)
+        self.assertEqual(p.rate, 500)
+        self.assertEqual(p.eta, 8.0)
+        self.assertAlmostEqual(p.chance, 0.2212, places=4)
+        self.assertIn("500 keys/s", str(p))
+
+        p = vanity.Progress(10000, 20.0, 4000)
+        self.assertEqual(p.eta, 8.0)
+        self.assertIn("ETA 8s", str(p))
+
+        p = vanity.Progress(1000, 2.0, None)
+        self.assertEqual(p.eta, None)
+        self.assertEqual(str(p), "1000 keys, 500 keys/s")
+
+
+class TestRangeMatcher(TestCase):
+    """A TestCase checking that RangeMatcher agrees with the regex."""
+
+    cf = coinutil.CoinFactory
+
+    def do_test(self, name):
+        """Match generated addresses against prefixes of other addresses."""
+        Coin = self.cf.get(name)
+        coins = [Coin() for _ in range(20)]
+
+        for c1, c2 in zip(coins, coins[1:] + coins[:1]):
+            addr = c1.addr_string()
+            pub = c1.keypair.pub(True)
+            for n in range(1, 5):
+                m = vanity.RangeMatcher(Coin, [addr[:n]])
+                self.assertEqual(m.match(pub), [addr[:n]])
+
+                patterns = [c2.addr_string()[:n], addr[:n] + "z"]
+                m = vanity.RangeMatcher(Coin, patterns)
+                r = vanity.RegexMatcher(Coin, patterns)
+                self.assertEqual(m.match(pub), r.match(pub))
+
+    def test_suffix(self):
+        """Check SuffixMatcher against the regex for generated addresses."""
+        for name in ["bitcoin", "zcash"]:
+            Coin = self.cf.get(name)
+            for _ in range(20):
+                c1 = Coin()
+                c2 = Coin()
+                addr = c1.addr_string()
+                pub = c1.keypair.pub(True)
+                for n in range(1, 4):
+                    for case in [False, True]:
+                        patterns = [addr[-n:], c2.addr_string()[-n:]]
+                        args = (Coin, patterns, "suffix", case)
+                        m = vanity.SuffixMatcher(*args)
+                        r = vanity.RegexMatcher(*args)
+                        self.assertIn(addr[-n:], m.match(pub))
+                        self.assertEqual(m.match(pub), r.match(pub))
+
+    def test_expected(self):
+        """Check the expected attempts of some bitcoin patterns."""
+        Coin = self.cf.get("bitcoin")
+
+        def expected(Matcher, *patterns):
+            """Return the expected attempts of a Matcher for patterns."""
+            return Matcher(Coin, patterns).expected()
+
+        self.assertEqual(expected(vanity.RangeMatcher, "1"), 1)
+        self.assertEqual(expected(vanity.RangeMatcher, "3"), float("inf"))
+        self.assertLess(expected(vanity.RangeMatcher, "12"),
+                        expected(vanity.RegexMatcher, "12"))
+        self.assertAlmostEqual(vanity.SuffixMatcher(Coin, ["ab"]).expected(),
+                               58 ** 2 / 4)
+        self.assertAlmostEqual(
+            vanity.SuffixMatcher(Coin, ["ab"], case=True).expected(), 58 ** 2)
+        self.assertGreater(
+            vanity.RegexMatcher(Coin, ["abc"], mode="substring").expected(),
+            58 ** 3 / 8 / 34)
+        self.assertAlmostEqual(expected(vanity.RangeMatcher, "1a", "1b"),
+                               1 / (1 / expected(vanity.RangeMatcher, "1a") +
+                                    1 / expected(vanity.RangeMatcher, "1b")))
+
+    def test_all(self):
+        """Run do_test on coins with various versions."""
+        for name in ["bitcoin", "litecoin", "dogecoin", "zcash"]:
+            self.do_test(name)
+
+
+class TestHexMatcher(TestCase):
+    """A TestCase checking that HexMatcher agrees with the regex."""
+
+    cf = coinutil.CoinFactory
+
+    def test_all(self):
+        """Match generated addresses in every mode and case."""
+        Coin = self.cf.get("ethereum")
+        for _ in range(20):
+            c1 = Coin()
+            c2 = Coin()
+            addr = c1.addr_string()
+            other = c2.addr_string()
+            pub = c1.keypair.pub_u
+            for mode, part in [("prefix", lambda a: a[:5]),
+                               ("suffix", lambda a: a[-3:]),
+                               ("substring", lambda a: a[10:13])]:
+                for case in [False, True]:
+                    patterns = [part(addr), part(other).swapcase()]
+                    args = (Coin, patterns, mode, case)
+                    m = vanity.HexMatcher(*args)
+                    r = vanity.RegexMatcher(*args)
+                    self.assertIn(part(addr), m.match(pub))
+                    self.assertEqual(m.match(pub), r.match(pub))
+
+    def test_expected(self):
+        """Check the expected attempts of some ethereum patterns."""
+        Coin = self.cf.get("ethereum")
+
+        def expected(pattern, mode="prefix", case=False):
+            """Return the expected attempts of a HexMatcher for pattern."""
+            return vanity.HexMatcher(Coin, [pattern], mode, case).expected()
+
+        self.assertAlmostEqual(expected("0xab"), 16 ** 2)
+        self.assertAlmostEqual(expected("0xAb", case=True), 32 ** 2)
+        self.assertAlmostEqual(expected("0x12", case=True), 16 ** 2)
+        self.assertAlmostEqual(expected("abc", "suffix"), 16 ** 3)
+        self.assertEqual(expected("0xg"), float("inf"))
+        self.assertEqual(expected("ab"), float("inf"))
+        self.assertAlmostEqual(expected("0"), 1)
+        self.assertAlmostEqual(expected("0X"), 1)
+        self.assertEqual(expected("0X", case=True), float("inf"))
+
+        g = vanity.Generator(Coin)
+        self.assertEqual(len(g.run("0")), 1)
+        self.assertRaises(vanity.ImpossiblePatternException, g.run, "1")
+
+        g = vanity.Generator(Coin)
+        with self.assertRaises(vanity.ImpossiblePatternException):
+            g.run("dead")
+
+
+class TestMultiMatcher(TestCase):
+    """A TestCase checking that MultiMatcher agrees with each coin."""
+
+    cf = coinutil.CoinFactory
+
+    def test_all(self):
+        """Match generated keys against the addresses of every coin."""
+        Coins = [self.cf.get(n) for n in ["bitcoin", "litecoin", "zcash"]]
+        for _ in range(10):
+            kp = ec.KeyPair(Coins[0].curve)
+            addrs = [C.pub2addr(kp.pub_c).export(C.addr_type) for C in Coins]
+            for mode, part in [("prefix", lambda a: a[:3]),
+                               ("suffix", lambda a: a[-2:]),
+                               ("substring", lambda a: a[5:7])]:
+                patterns = [part(a) for a in addrs]
+                m = vanity.MultiMatcher(Coins, patterns, mode)
+                hits = dict(m.match_all(kp.pub_c))
+                for i, C in enumerate(Coins):
+                    r = vanity.RegexMatcher(C, patterns, mode)
+                    self.assertEqual(hits.get(i, []), r.match(kp.pub_c))
+
+
+class TestWorkerPool(TestCase):
+    """A TestCase for reusing and closing the vanity worker pool."""
+
+    cf = coinutil.CoinFactory
+
+    def test_reuse(self):
+        """Check that consecutive searches share the same processes."""
+        Coin = self.cf.get("bitcoin")
+        g1 = vanity.Generator(Coin, jobs=2)
+        g1.run("1a")
+        g2 = vanity.Generator(Coin, jobs=2)
+        g2.run("1b")
+
+        self.assertIs(g1.pool, g2.pool)
+        self.assertEqual(len(g1.pool.processes), 2)
+        self.assertTrue(g1.pool.alive())
+
+    def test_close(self):
+        """Check that a closed pool exits cleanly and is replaced."""
+        pool = vanity.WorkerPool(2)
+        task = vanity.Task(self.cf.get("litecoin"), ["L"])
+        self.assertEqual(len(pool.run(task)[0][2]), 1)
+        pool.close()
+
+        for p in pool.processes:
+            self.assertEqual(p.exitcode, 0)
+
+    def test_slots(self):
+        """Check that every part of a budget is counted exactly once."""
+        Coin = self.cf.get("bitcoin")
+        g = vanity.Generator(Coin, jobs=8, max_keys=64, top=1)
+        for _ in range(5):
+            g.run("1abcdefgh")
+            self.assertEqual(g.pool.attempts(), 64)
+            self.assertEqual(list(g.pool.counters), [8] * 8)
+
+    def test_dead_worker(self):
+        """Check that a search fails instead of waiting for a dead worker."""
+        pool = vanity.WorkerPool(2)
+        pool.processes[0].terminate()
+        pool.processes[0].join()
+        task = vanity.Task(self.cf.get("bitcoin"), ["1abcdefgh"])
+        self.assertRaises(vanity.WorkerError, pool.run, task, interval=0.05)
+        self.assertFalse(pool.alive())
+
+
+class TestCheckpoint(TestCase):
+    """A TestCase for saving and resuming vanity searches."""
+
+    cf = coinutil.CoinFactory
+
+    def setUp(self):
+        """Make a directory for state files."""
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "state")
+
+    def tearDown(self):
+        """Remove the directory of state files."""
+        self.dir.cleanup()
+
+    def test_resume(self):
+        """Check that a reopened checkpoint continues where it stopped."""
+        Coin = self.cf.get("bitcoin")
+        task = vanity.Task(Coin, ["1ab"])
+        c1 = vanity.Checkpoint.open(self.path, task, 2)
+        mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        self.assertEqual(mode, 0o600)
+
+        starts = [c1.keypair(Coin.curve, i).priv.int for i in range(2)]
+        self.assertNotEqual(starts[0], starts[1])
+        c1.update([3, 7], force=True)
+
+        c2 = vanity.Checkpoint.open(self.path, task, 4)
+        self.assertEqual(c2.offsets, [3, 7])
+        for i in range(2):
+            k = c2.keypair(Coin.curve, i).priv.int
+            self.assertEqual(k, starts[i] + c2.offsets[i])
+
+        other = vanity.Task(Coin, ["1cd"])
+        with self.assertRaises(vanity.CheckpointException):
+            vanity.Checkpoint.open(self.path, other, 2)
+
+    def test_run(self):
+        """Check that a search with a state file finds a match."""
+        Coin = self.cf.get("bitcoin")
+        g = vanity.Generator(Coin, jobs=2, state=self.path)
+        m = g.run("1a")[0]
+        coin = Coin(key=m.priv)
+        self.assertEqual(coin.addr_string()[:2].lower(), "1a")
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestPrefixTable(TestCase):
+    """A TestCase for the leading characters of coins."""
+
+    cf = coinutil.CoinFactory
+
+    def do_test(self, name, chars):
+        """Check the leading characters of a coin."""
+        leading = vanity.PrefixTable.get(self.cf.get(name))
+        self.assertEqual(sorted(leading), chars)
+        self.assertAlmostEqual(sum(leading.values()), 1)
+
+    def test_set(self):
+        """Check a few coins, and that impossible patterns are rejected."""
+        self.do_test("bitcoin", ["1"])
+        self.do_test("litecoin", ["L"])
+        self.do_test("bitcointestnet", ["m", "n"])
+        self.assertIsNone(vanity.PrefixTable.get(self.cf.get("ethereum")))
+
+        g = vanity.Generator(self.cf.get("litecoin"))
+        self.assertRaises(vanity.ImpossiblePatternException, g.run, "1ab")
+        self.assertRaises(vanity.ImpossiblePatternException, g.run,
+                          ["Lab", "Mab"])
+        self.assertRaises(vanity.ImpossiblePatternException, g.run, "L0")
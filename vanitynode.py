@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+from pyperlib import cluster
+import argparse
+import sys
+
+parser = argparse.ArgumentParser(description="Run vanity searches handed \
+out by a cpyper coordinator (see --coordinate).")
+parser.add_argument("address", help="the host:port or socket path of the \
+coordinator")
+parser.add_argument("--authkey", required=True, help="the secret shared by \
+the coordinator and its nodes")
+parser.add_argument("--jobs", type=int, default=None, help="the number of \
+processes to search with (default=all cores)")
+args = parser.parse_args()
+
+node = cluster.Node(args.address, args.authkey, args.jobs)
+
+try:
+    node.serve()
+except KeyboardInterrupt:
+    sys.exit(3)